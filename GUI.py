@@ -1,26 +1,35 @@
 import sys
+import time
 import numpy as np
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                                QHBoxLayout, QLabel, QLineEdit, QPushButton, 
                                QTextEdit, QGroupBox, QGridLayout, QRadioButton,
                                QButtonGroup, QScrollArea, QFrame, QSplitter,
-                               QTableWidget, QTableWidgetItem, QHeaderView)
-from PySide6.QtCore import Qt
+                               QTableView, QHeaderView, QProgressBar, QSlider, QCheckBox)
+from PySide6.QtCore import (Qt, QAbstractTableModel, QModelIndex, QObject, QRunnable,
+                            QThreadPool, QTimer, Signal)
 from PySide6.QtGui import QFont
 
 from controller import Controller
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-from mpl_toolkits.mplot3d import Axes3D
+from lod import LevelOfDetail
+
+# matplotlib (and its 3D toolkit) is imported only once the plot is first
+# shown, after the window has painted, so importing this module stays cheap
 
 class VisualizationWidget(QWidget):
+    # 2D clicks as (x, y, pick radius) in data coordinates
+    point_clicked = Signal(float, float, float)
+    PICK_RADIUS_PIXELS = 8
+    # canvas pixels per drawn point; past that budget a level-of-detail
+    # sample is drawn, and 3D gets a quarter of it
+    LOD_PIXELS_PER_POINT = 20
+    LOD_MIN_POINTS = 1000
+    
     def __init__(self):
         super().__init__()
         self.layout = QVBoxLayout(self)
-        self.figure = Figure(figsize=(10, 8))
-        self.canvas = FigureCanvas(self.figure)
-        self.layout.addWidget(self.canvas)
+        self.figure = None
+        self.canvas = None
         
         controls_layout = QHBoxLayout()
         self.reset_view_btn = QPushButton("Reset View")
@@ -41,12 +50,65 @@ class VisualizationWidget(QWidget):
         self.is_3d = False
         self.ax = None
         self.grid_visible = True
-        
-    def setup_plot(self, is_3d):
+        # incremental mode keeps one set of artists alive and updates their
+        # data in place; 2D redraws blit them over a cached background
+        self.incremental = True
+        self._artists = None
+        self._background = None
+        self._pending_points = None
+        # the sample is rebuilt only when the original points change; a
+        # zoom resamples inside the new view and leaves it there until reset
+        self._lod = None
+        self._lod_key = None
+        self._last_plot = None
+        self._sampled_limits = None
+        self._user_view = False
+        self._refine_timer = QTimer(self)
+        self._refine_timer.setSingleShot(True)
+        self._refine_timer.setInterval(50)
+        self._refine_timer.timeout.connect(self._refine)
+    
+    def ensure_canvas(self):
+        if self.canvas is not None:
+            return
+        from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+        self.figure = Figure(figsize=(10, 8))
+        self.canvas = FigureCanvas(self.figure)
+        self.layout.insertWidget(0, self.canvas)
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.canvas.mpl_connect('scroll_event', self._on_scroll)
+        self.canvas.mpl_connect('button_release_event', self._on_release)
+        self.canvas.mpl_connect('button_press_event', self._on_press)
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.canvas is None:
+            # let the window paint first, then build the canvas
+            QTimer.singleShot(0, self._build_deferred)
+    
+    def _build_deferred(self):
+        if self.canvas is not None:
+            return
+        pending = self._pending_points
+        self.setup_plot(self.is_3d, force=True)
+        if pending is not None:
+            self.plot_points(*pending)
+    
+    def setup_plot(self, is_3d, force=False):
         self.is_3d = is_3d
+        self._pending_points = None
+        if self.canvas is None and not force:
+            return
+        self.ensure_canvas()
         self.figure.clear()
+        self._artists = None
+        self._background = None
+        self._last_plot = None
+        self._user_view = False
         
         if is_3d:
+            import mpl_toolkits.mplot3d  # registers the '3d' projection
             self.ax = self.figure.add_subplot(111, projection='3d')
             self.ax.set_xlabel('X', fontsize=12, color='white')
             self.ax.set_ylabel('Y', fontsize=12, color='white')
@@ -79,8 +141,242 @@ class VisualizationWidget(QWidget):
     
     def plot_points(self, original_points, transformed_points=None):
         if self.ax is None:
+            # remembered until the deferred canvas is built
+            self._pending_points = (original_points, transformed_points)
             return
-            
+        if not self.incremental:
+            self._plot_points_full(original_points, transformed_points)
+            return
+        
+        self._last_plot = (original_points, transformed_points)
+        dim = 3 if self.is_3d else 2
+        orig = self._point_columns(original_points, dim)
+        if transformed_points is not None and transformed_points.shape[0] >= dim:
+            trans = np.asarray(transformed_points[:dim], dtype=float)
+        else:
+            trans = np.empty((dim, 0))
+        
+        if self._artists is None:
+            self._create_artists()
+        refit = not self._user_view and self._fit_limits(orig, trans)
+        self._update_artists(*self._visible_subset(original_points, orig, trans))
+        self._sampled_limits = self._view_limits()
+        
+        if refit or self.is_3d or self._background is None:
+            self.canvas.draw()
+        else:
+            self._blit()
+    
+    def _point_columns(self, points, dim):
+        if hasattr(points, 'array'):
+            return np.asarray(points.array[:, :dim], dtype=float).T
+        if isinstance(points, np.ndarray):
+            return np.asarray(points[:dim], dtype=float)
+        if len(points) == 0:
+            return np.empty((dim, 0))
+        names = ('x', 'y', 'z')[:dim]
+        return np.array([[getattr(p, name) for name in names] for p in points], dtype=float).T
+    
+    def _point_budget(self):
+        budget = self.canvas.width() * self.canvas.height() // self.LOD_PIXELS_PER_POINT
+        if self.is_3d:
+            budget //= 4
+        return max(self.LOD_MIN_POINTS, budget)
+    
+    def _visible_subset(self, original_points, orig, trans):
+        # arrows and lines are drawn for the sampled points only
+        n = orig.shape[1]
+        budget = self._point_budget()
+        if n <= budget:
+            return orig, trans
+        key = (id(original_points), n, getattr(original_points, 'version', None), self.is_3d)
+        if self._lod_key != key:
+            self._lod = LevelOfDetail(orig.T)
+            self._lod_key = key
+        paired = trans.shape[1] == n
+        viewport = self._viewport() if self._user_view else None
+        index = self._lod.sample(budget, viewport, trans.T if paired else None)
+        return orig[:, index], (trans[:, index] if paired else trans)
+    
+    def _view_limits(self):
+        getters = [self.ax.get_xlim, self.ax.get_ylim] + ([self.ax.get_zlim] if self.is_3d else [])
+        return tuple(tuple(sorted(get())) for get in getters)
+    
+    def _viewport(self):
+        limits = np.array(self._view_limits())
+        return limits[:, 0], limits[:, 1]
+    
+    def _refine(self):
+        if self.ax is not None and self._last_plot is not None:
+            self.plot_points(*self._last_plot)
+    
+    def _on_scroll(self, event):
+        if self.ax is None or event.inaxes is not self.ax:
+            return
+        factor = 0.8 if event.button == 'up' else 1.25
+        limits = self._view_limits()
+        if self.is_3d:
+            centers = [(low + high) / 2 for low, high in limits]
+        else:
+            centers = [event.xdata, event.ydata]
+        setters = [self.ax.set_xlim, self.ax.set_ylim] + ([self.ax.set_zlim] if self.is_3d else [])
+        for set_lim, (low, high), c in zip(setters, limits, centers):
+            set_lim(c - (c - low) * factor, c + (high - c) * factor)
+        self._user_view = True
+        self.canvas.draw()
+        self._refine_timer.start()
+    
+    def _on_press(self, event):
+        if self.is_3d or self.ax is None or event.inaxes is not self.ax or event.button != 1:
+            return
+        x_low, x_high = self.ax.get_xlim()
+        radius = self.PICK_RADIUS_PIXELS * abs(x_high - x_low) / max(self.ax.bbox.width, 1)
+        self.point_clicked.emit(event.xdata, event.ydata, radius)
+    
+    def _on_release(self, event):
+        # mouse zoom in the 3D view changes the limits without a scroll
+        if self.ax is None or self._last_plot is None:
+            return
+        if self._view_limits() != self._sampled_limits:
+            self._user_view = True
+            self._refine_timer.start()
+    
+    def _create_artists(self):
+        animated = not self.is_3d
+        if self.is_3d:
+            empty = ([], [], [])
+            orig_scatter = self.ax.scatter(*empty, c='#3498db', s=100, alpha=0.8,
+                                           label='Original Points', marker='o')
+            trans_scatter = self.ax.scatter(*empty, c='#e74c3c', s=100, alpha=0.8,
+                                            label='Transformed Points', marker='^')
+            orig_line, = self.ax.plot(*empty, c='#3498db', alpha=0.5, linewidth=2)
+            trans_line, = self.ax.plot(*empty, c='#e74c3c', alpha=0.5, linewidth=2)
+        else:
+            empty = np.empty((0, 2))
+            orig_scatter = self.ax.scatter(empty[:, 0], empty[:, 1], c='#3498db', s=100, alpha=0.8,
+                                           label='Original Points', marker='o', animated=animated)
+            trans_scatter = self.ax.scatter(empty[:, 0], empty[:, 1], c='#e74c3c', s=100, alpha=0.8,
+                                            label='Transformed Points', marker='^', animated=animated)
+            orig_line, = self.ax.plot([], [], c='#3498db', alpha=0.5, linewidth=2, animated=animated)
+            trans_line, = self.ax.plot([], [], c='#e74c3c', alpha=0.5, linewidth=2, animated=animated)
+        
+        legend = self.ax.legend(handles=[orig_scatter, trans_scatter], loc='upper right',
+                                frameon=True, fancybox=True, shadow=True)
+        legend.get_frame().set_facecolor('#34495e')
+        legend.get_frame().set_alpha(0.8)
+        for text in legend.get_texts():
+            text.set_color('white')
+        legend.set_visible(False)
+        legend.set_animated(animated)
+        
+        self._artists = {
+            'orig_scatter': orig_scatter,
+            'trans_scatter': trans_scatter,
+            'orig_line': orig_line,
+            'trans_line': trans_line,
+            'arrows': None,
+            'legend': legend,
+        }
+    
+    def _update_arrows(self, orig, trans):
+        arrows = self._artists['arrows']
+        n = orig.shape[1]
+        if n == 0 or n != trans.shape[1]:
+            if arrows is not None:
+                arrows.set_visible(False)
+            return
+        if self.is_3d:
+            segments = np.stack([orig.T, trans.T], axis=1)
+            if arrows is None:
+                from mpl_toolkits.mplot3d.art3d import Line3DCollection
+                arrows = Line3DCollection(segments, colors='#f39c12', alpha=0.6, linewidths=1.5)
+                self.ax.add_collection3d(arrows)
+            else:
+                arrows.set_segments(segments)
+        else:
+            delta = trans - orig
+            if arrows is None or arrows.N != n:
+                # a quiver's arrow count is fixed, so only a new point count rebuilds it
+                if arrows is not None:
+                    arrows.remove()
+                arrows = self.ax.quiver(orig[0], orig[1], delta[0], delta[1], angles='xy',
+                                        scale_units='xy', scale=1, color='#f39c12', alpha=0.7,
+                                        width=0.004, animated=True)
+            else:
+                arrows.set_offsets(orig.T)
+                arrows.set_UVC(delta[0], delta[1])
+        arrows.set_visible(True)
+        self._artists['arrows'] = arrows
+    
+    def _update_artists(self, orig, trans):
+        a = self._artists
+        if self.is_3d:
+            a['orig_scatter']._offsets3d = tuple(orig)
+            a['trans_scatter']._offsets3d = tuple(trans)
+            a['orig_line'].set_data_3d(*orig)
+            a['trans_line'].set_data_3d(*trans)
+        else:
+            a['orig_scatter'].set_offsets(orig.T)
+            a['trans_scatter'].set_offsets(trans.T)
+            a['orig_line'].set_data(orig[0], orig[1])
+            a['trans_line'].set_data(trans[0], trans[1])
+        a['orig_line'].set_visible(orig.shape[1] > 1)
+        a['trans_line'].set_visible(trans.shape[1] > 1)
+        self._update_arrows(orig, trans)
+        a['legend'].set_visible(orig.shape[1] > 0 and trans.shape[1] > 0)
+    
+    def _fit_limits(self, orig, trans):
+        # returns True when the view had to change, which needs a full draw
+        points = np.concatenate([orig, trans], axis=1)
+        if points.shape[1] == 0:
+            return False
+        low = points.min(axis=1)
+        high = points.max(axis=1)
+        setters = [self.ax.set_xlim, self.ax.set_ylim] + ([self.ax.set_zlim] if self.is_3d else [])
+        current = self._view_limits()
+        inside = all(c[0] <= l and h <= c[1] for c, l, h in zip(current, low, high))
+        # refit too when the data shrank to a small corner of the view; axes
+        # along which the data is flat (one point, a line) never count
+        crowded = all((h - l) >= 0.25 * (c[1] - c[0]) for c, l, h in zip(current, low, high) if h > l)
+        if inside and crowded:
+            return False
+        span = np.maximum(high - low, 1e-9)
+        pad = np.where(high - low > 0, span * 0.1, 1)
+        for set_lim, l, h, p in zip(setters, low, high, pad):
+            set_lim(l - p, h + p)
+        return True
+    
+    def _animated_artists(self):
+        if self._artists is None or self.is_3d:
+            return []
+        a = self._artists
+        artists = [a['orig_line'], a['trans_line'], a['orig_scatter'], a['trans_scatter']]
+        if a['arrows'] is not None:
+            artists.append(a['arrows'])
+        artists.append(a['legend'])
+        return artists
+    
+    def _draw_animated(self):
+        for artist in self._animated_artists():
+            self.ax.draw_artist(artist)
+    
+    def _on_draw(self, event):
+        # a full draw leaves the animated artists out; cache that background
+        # and paint them on top so the next update can blit
+        if self.is_3d or self._artists is None:
+            self._background = None
+            return
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_animated()
+    
+    def _blit(self):
+        self.canvas.restore_region(self._background)
+        self._draw_animated()
+        self.canvas.blit(self.figure.bbox)
+    
+    def _plot_points_full(self, original_points, transformed_points=None):
+        self._artists = None
+        self._background = None
         self.ax.clear()
         
         self.ax.set_facecolor('#34495e')
@@ -180,8 +476,12 @@ class VisualizationWidget(QWidget):
         self.canvas.draw()
     
     def reset_view(self):
-        if self.ax and self.is_3d:
+        if self.ax is None:
+            return
+        if self.is_3d:
             self.ax.view_init(elev=20, azim=45)
+        self._user_view = False
+        self._refine()
         self.canvas.draw()
     
     def toggle_grid(self):
@@ -192,6 +492,10 @@ class VisualizationWidget(QWidget):
     
     def clear_plot(self):
         if self.ax:
+            self._artists = None
+            self._background = None
+            self._last_plot = None
+            self._user_view = False
             self.ax.clear()
             self.ax.set_facecolor('#34495e')
             self.ax.tick_params(colors='white')
@@ -211,13 +515,186 @@ class VisualizationWidget(QWidget):
             self.canvas.draw()
 
 
+class PointsTableModel(QAbstractTableModel):
+    # reads straight from a controller PointStore and exposes rows lazily,
+    # FETCH_BATCH at a time, so views never touch more rows than they show
+    FETCH_BATCH = 1000
+    HEADERS = ("X", "Y", "Z")
+    
+    def __init__(self, store=None, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self._loaded = 0
+        self._known = 0
+    
+    def set_store(self, store):
+        self.beginResetModel()
+        self.store = store
+        self._known = len(store) if store is not None else 0
+        self._loaded = min(self._known, self.FETCH_BATCH)
+        self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+    
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.store is None:
+            return 0
+        return self.store.dim
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or self.store is None:
+            return None
+        if role == Qt.DisplayRole:
+            return f"{self.store.array[index.row(), index.column()]:.2f}"
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.HEADERS[section] if section < len(self.HEADERS) else None
+        return str(section + 1)
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < self._known
+    
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(self.FETCH_BATCH, self._known - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+    
+    def load_through(self, row):
+        # loads every batch up to the one holding row, e.g. to select it
+        target = min(self._known, (row // self.FETCH_BATCH + 1) * self.FETCH_BATCH)
+        if target > self._loaded:
+            self.beginInsertRows(QModelIndex(), self._loaded, target - 1)
+            self._loaded = target
+            self.endInsertRows()
+    
+    def points_added(self):
+        # rows only need inserting when the view had already fetched all rows;
+        # otherwise canFetchMore picks up the new points on demand
+        total = len(self.store)
+        fully_loaded = self._loaded == self._known
+        self._known = total
+        if fully_loaded:
+            self.fetchMore()
+    
+    def points_removed(self, first, last):
+        last = min(last, self._loaded - 1)
+        if first <= last:
+            self.beginRemoveRows(QModelIndex(), first, last)
+            self._loaded -= last - first + 1
+            self._known = len(self.store)
+            self.endRemoveRows()
+        else:
+            self._known = len(self.store)
+
+
+class TransformSignals(QObject):
+    progress = Signal(int, int, int)
+    finished = Signal(int, object, str)
+    failed = Signal(int, str)
+    cancelled = Signal(int)
+
+
+class TransformWorker(QRunnable):
+    # multiplies the packed points chunk by chunk off the UI thread; every
+    # signal carries the request generation so stale results can be dropped
+    CHUNK_SIZE = 1 << 16
+    MAX_RESULT_LINES = 1000
+    
+    def __init__(self, generation, matrix, points, is_3d, chunk_size=None):
+        super().__init__()
+        self.generation = generation
+        self.matrix = matrix
+        self.points = points
+        self.is_3d = is_3d
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        self.signals = TransformSignals()
+        self._cancelled = False
+    
+    def cancel(self):
+        self._cancelled = True
+    
+    def run(self):
+        try:
+            total = self.points.shape[1]
+            result = np.empty((self.matrix.shape[0], total), dtype=np.result_type(self.matrix, self.points))
+            for start in range(0, total, self.chunk_size):
+                if self._cancelled:
+                    self.signals.cancelled.emit(self.generation)
+                    return
+                stop = min(start + self.chunk_size, total)
+                block = result[:, start:stop]
+                np.matmul(self.matrix, self.points[:, start:stop], out=block)
+                np.round(block, 3, out=block)
+                self.signals.progress.emit(self.generation, stop, total)
+            if self._cancelled:
+                self.signals.cancelled.emit(self.generation)
+                return
+            self.signals.finished.emit(self.generation, result, self.format_result(result))
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+    
+    def format_result(self, result):
+        shown = min(result.shape[1], self.MAX_RESULT_LINES)
+        if self.is_3d:
+            lines = [f"Point {i+1}: ({x:.4f}, {y:.4f}, {z:.4f})" for i, (x, y, z) in enumerate(result[0:3, :shown].T)]
+        else:
+            lines = [f"Point {i+1}: ({x:.4f}, {y:.4f})" for i, (x, y) in enumerate(result[0:2, :shown].T)]
+        if result.shape[1] > shown:
+            lines.append(f"... {result.shape[1] - shown} more points not shown")
+        return "\n".join(lines)
+
+
+class LiveUpdateThrottle(QObject):
+    # coalesces bursts of requests into at most one callback per frame;
+    # requests arriving while one is pending are simply dropped
+    def __init__(self, callback, fps=60, parent=None):
+        super().__init__(parent)
+        self.callback = callback
+        self.interval_ms = int(1000 / fps)
+        self._pending = False
+        self._last = 0.0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._fire)
+    
+    def request(self):
+        self._pending = True
+        if not self.timer.isActive():
+            elapsed_ms = (time.monotonic() - self._last) * 1000
+            self.timer.start(max(0, int(self.interval_ms - elapsed_ms)))
+    
+    def _fire(self):
+        if not self._pending:
+            return
+        self._pending = False
+        self._last = time.monotonic()
+        self.callback()
+
+
 class GeometricTransformGUI(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Geometric Transformer")
-        self.setGeometry(100, 100, 900, 700)
+        self.setGeometry(100, 100, 1300, 800)
         self.controller = Controller()
         self.is_3d_mode = False
+        self.thread_pool = QThreadPool.globalInstance()
+        self.transform_generation = 0
+        self.active_worker = None
+        self.last_result = None
+        self.last_matrix = None
+        self.live_buffer = None
+        self.live_throttle = LiveUpdateThrottle(self.live_update, fps=60, parent=self)
         self.setupUI()
         self.setStyleSheet(self.get_stylesheet())
     
@@ -283,15 +760,25 @@ class GeometricTransformGUI(QMainWindow):
         
         points_layout.addLayout(add_point_layout)
         
-        self.points_table = QTableWidget()
+        self.points_model = PointsTableModel(parent=self)
+        self.points_table = QTableView()
+        self.points_table.setModel(self.points_model)
         self.points_table.setMaximumHeight(150)
+        self.points_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.points_table.setSelectionBehavior(QTableView.SelectRows)
         self.update_points_table()
         points_layout.addWidget(self.points_table)
         
+        points_buttons_layout = QHBoxLayout()
+        self.remove_points_btn = QPushButton("➖ Remove Selected")
+        self.remove_points_btn.clicked.connect(self.remove_selected_points)
+        points_buttons_layout.addWidget(self.remove_points_btn)
+        
         self.clear_points_btn = QPushButton("🗑️ Clear All Points")
         self.clear_points_btn.setObjectName("clear_button")
         self.clear_points_btn.clicked.connect(self.clear_points)
-        points_layout.addWidget(self.clear_points_btn)
+        points_buttons_layout.addWidget(self.clear_points_btn)
+        points_layout.addLayout(points_buttons_layout)
         
         left_layout.addWidget(points_group)
         
@@ -334,6 +821,33 @@ class GeometricTransformGUI(QMainWindow):
         transform_layout.addWidget(self.tz_label, 5, 0)
         transform_layout.addWidget(self.tz_input, 5, 1)
         
+        # sliders write into the line edits; (slider, line edit, value per tick)
+        self.scale_slider = QSlider(Qt.Horizontal)
+        self.angle_slider = QSlider(Qt.Horizontal)
+        self.tx_slider = QSlider(Qt.Horizontal)
+        self.ty_slider = QSlider(Qt.Horizontal)
+        self.tz_slider = QSlider(Qt.Horizontal)
+        self.live_controls = [
+            (self.scale_slider, self.scale_input, 0.01, (10, 500), 100, 0),
+            (self.angle_slider, self.angle_input, 1.0, (-180, 180), 0, 1),
+            (self.tx_slider, self.tx_input, 0.1, (-100, 100), 0, 3),
+            (self.ty_slider, self.ty_input, 0.1, (-100, 100), 0, 4),
+            (self.tz_slider, self.tz_input, 0.1, (-100, 100), 0, 5),
+        ]
+        for slider, line_edit, step, (low, high), value, row in self.live_controls:
+            slider.setRange(low, high)
+            slider.setValue(value)
+            slider.valueChanged.connect(
+                lambda tick, line_edit=line_edit, step=step: self.on_slider_moved(line_edit, tick * step))
+            line_edit.textEdited.connect(self.request_live_update)
+            transform_layout.addWidget(slider, row, 2)
+        for line_edit in (self.axis_x_input, self.axis_y_input, self.axis_z_input):
+            line_edit.textEdited.connect(self.request_live_update)
+        
+        self.live_checkbox = QCheckBox("Live update")
+        self.live_checkbox.toggled.connect(self.request_live_update)
+        transform_layout.addWidget(self.live_checkbox, 6, 0, 1, 3)
+        
         self.set_3d_controls_visible(False)
         
         left_layout.addWidget(transform_group)
@@ -343,6 +857,17 @@ class GeometricTransformGUI(QMainWindow):
         self.perform_btn.clicked.connect(self.perform_transformation)
         left_layout.addWidget(self.perform_btn)
         
+        progress_layout = QHBoxLayout()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.cancel_btn = QPushButton("✖ Cancel")
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancel_transformation)
+        progress_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.cancel_btn)
+        left_layout.addLayout(progress_layout)
+        
         preset_layout = QHBoxLayout()
         self.preset_rotate_btn = QPushButton("📐 Rotate 90°")
         self.preset_scale_btn = QPushButton("📏 Scale 2x")
@@ -359,14 +884,26 @@ class GeometricTransformGUI(QMainWindow):
         
         left_layout.addStretch()
         
+        right_splitter = QSplitter(Qt.Vertical)
+        self.visualization = VisualizationWidget()
+        self.visualization.setup_plot(False)
+        self.visualization.point_clicked.connect(self.on_plot_clicked)
+        right_splitter.addWidget(self.visualization)
+        
+        results_panel = QWidget()
+        results_layout = QVBoxLayout(results_panel)
         results_title = QLabel("Results")
         results_title.setObjectName("title")
         results_title.setAlignment(Qt.AlignCenter)
-        right_layout.addWidget(results_title)
+        results_layout.addWidget(results_title)
         
         self.results_text = QTextEdit()
         self.results_text.setReadOnly(True)
-        right_layout.addWidget(self.results_text)
+        results_layout.addWidget(self.results_text)
+        right_splitter.addWidget(results_panel)
+        right_splitter.setStretchFactor(0, 3)
+        right_splitter.setStretchFactor(1, 1)
+        right_layout.addWidget(right_splitter)
         
         splitter.addWidget(left_panel)
         splitter.addWidget(right_panel)
@@ -488,7 +1025,7 @@ class GeometricTransformGUI(QMainWindow):
             border: 2px solid #3498db;
         }
         
-        QTableWidget {
+        QTableView {
             background: rgba(44, 62, 80, 0.8);
             border: 2px solid #34495e;
             border-radius: 6px;
@@ -497,12 +1034,12 @@ class GeometricTransformGUI(QMainWindow):
             gridline-color: #34495e;
         }
         
-        QTableWidget::item {
+        QTableView::item {
             padding: 4px;
             border-bottom: 1px solid #34495e;
         }
         
-        QTableWidget::item:selected {
+        QTableView::item:selected {
             background: rgba(52, 152, 219, 0.3);
         }
         
@@ -564,10 +1101,16 @@ class GeometricTransformGUI(QMainWindow):
     
     def on_mode_changed(self, button):
         self.is_3d_mode = (button == self.mode_3d)
+        self.supersede_worker()
+        self.last_result = None
         self.set_3d_controls_visible(self.is_3d_mode)
         self.z_input.setEnabled(self.is_3d_mode)
         self.update_points_table()
         self.clear_results()
+        self.live_buffer = None
+        self.last_matrix = None
+        self.visualization.setup_plot(self.is_3d_mode)
+        self.request_live_update()
     
     def set_3d_controls_visible(self, visible):
         self.axis_label.setVisible(visible)
@@ -576,6 +1119,7 @@ class GeometricTransformGUI(QMainWindow):
         self.axis_z_input.setVisible(visible)
         self.tz_label.setVisible(visible)
         self.tz_input.setVisible(visible)
+        self.tz_slider.setVisible(visible)
     
     def add_point(self):
         try:
@@ -590,7 +1134,7 @@ class GeometricTransformGUI(QMainWindow):
                 self.controller.add2DPoint(x, y)
                 self.results_text.append(f"Added 2D point: ({x:.2f}, {y:.2f})")
             
-            self.update_points_table()
+            self.points_model.points_added()
             
         except ValueError:
             self.results_text.append("Error: Please enter valid numbers for coordinates.")
@@ -598,31 +1142,38 @@ class GeometricTransformGUI(QMainWindow):
             self.results_text.append(f"Error adding point: {str(e)}")
     
     def clear_points(self):
+        self.supersede_worker()
+        self.last_result = None
         self.controller.current2DPoints.clear()
         self.controller.current3DPoints.clear()
         self.update_points_table()
+        self.visualization.plot_points(self.current_points(), None)
         self.results_text.append("All points cleared.")
     
+    def remove_selected_points(self):
+        rows = sorted({index.row() for index in self.points_table.selectionModel().selectedIndexes()})
+        if not rows:
+            self.results_text.append("Select the points to remove first.")
+            return
+        self.supersede_worker()
+        self.last_result = None
+        self.live_buffer = None
+        self.points_table.clearSelection()
+        self.current_points().remove(rows)
+        # one notification per contiguous run, last run first so the
+        # earlier row numbers stay valid
+        breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+        for run in reversed(np.split(np.array(rows), breaks)):
+            self.points_model.points_removed(int(run[0]), int(run[-1]))
+        self.visualization.plot_points(self.current_points(), None)
+        self.results_text.append(f"Removed {len(rows)} point{'s' if len(rows) != 1 else ''}.")
+        self.request_live_update()
+    
     def update_points_table(self):
         if self.is_3d_mode:
-            points = self.controller.current3DPoints
-            self.points_table.setColumnCount(3)
-            self.points_table.setHorizontalHeaderLabels(["X", "Y", "Z"])
+            self.points_model.set_store(self.controller.current3DPoints)
         else:
-            points = self.controller.current2DPoints
-            self.points_table.setColumnCount(2)
-            self.points_table.setHorizontalHeaderLabels(["X", "Y"])
-        
-        self.points_table.setRowCount(len(points))
-        
-        for i, point in enumerate(points):
-            if hasattr(point, 'x') and hasattr(point, 'y'):
-                self.points_table.setItem(i, 0, QTableWidgetItem(f"{point.x:.2f}"))
-                self.points_table.setItem(i, 1, QTableWidgetItem(f"{point.y:.2f}"))
-                if self.is_3d_mode and hasattr(point, 'z'):
-                    self.points_table.setItem(i, 2, QTableWidgetItem(f"{point.z:.2f}"))
-        
-        self.points_table.resizeColumnsToContents()
+            self.points_model.set_store(self.controller.current2DPoints)
     
     def perform_transformation(self):
         try:
@@ -636,9 +1187,8 @@ class GeometricTransformGUI(QMainWindow):
                 self.results_text.append("Error: No points to transform. Please add some points first.")
                 return
             
-            self.results_text.clear()
-            self.results_text.append(f"=== {'3D' if self.is_3d_mode else '2D'} Transformation ===")
-            self.results_text.append(f"Points to transform: {len(points)}")
+            header = [f"=== {'3D' if self.is_3d_mode else '2D'} Transformation ===",
+                      f"Points to transform: {len(points)}"]
             
             if self.is_3d_mode:
                 tz = float(self.tz_input.text())
@@ -646,36 +1196,151 @@ class GeometricTransformGUI(QMainWindow):
                 axis_y = float(self.axis_y_input.text())
                 axis_z = float(self.axis_z_input.text())
                 
-                self.results_text.append(f"Scale: {scale}")
-                self.results_text.append(f"Rotation: {angle}° around axis ({axis_x:.2f}, {axis_y:.2f}, {axis_z:.2f})")
-                self.results_text.append(f"Translation: ({tx:.2f}, {ty:.2f}, {tz:.2f})")
+                header.append(f"Scale: {scale}")
+                header.append(f"Rotation: {angle}° around axis ({axis_x:.2f}, {axis_y:.2f}, {axis_z:.2f})")
+                header.append(f"Translation: ({tx:.2f}, {ty:.2f}, {tz:.2f})")
                 
-                result = self.controller.perform3D(axis_x, axis_y, axis_z, scale, angle, tx, ty, tz)
+                matrix = self.controller.getMatrix3D(scale, (axis_x, axis_y, axis_z), angle, tx, ty, tz)
+                packed = self.controller.pack3D()
                 
             else:
-                self.results_text.append(f"Scale: {scale}")
-                self.results_text.append(f"Rotation: {angle}°")
-                self.results_text.append(f"Translation: ({tx:.2f}, {ty:.2f})")
+                header.append(f"Scale: {scale}")
+                header.append(f"Rotation: {angle}°")
+                header.append(f"Translation: ({tx:.2f}, {ty:.2f})")
                 
-                result = self.controller.perform2D(scale, angle, tx, ty)
+                matrix = self.controller.getMatrix2D(scale, angle, tx, ty)
+                packed = self.controller.pack2D()
             
-            self.results_text.append("\n--- Transformed Points ---")
-            if result is not None:
-                for i in range(result.shape[1]):
-                    if self.is_3d_mode:
-                        x, y, z = result[0:3, i]
-                        self.results_text.append(f"Point {i+1}: ({x:.4f}, {y:.4f}, {z:.4f})")
-                    else:
-                        x, y = result[0:2, i]
-                        self.results_text.append(f"Point {i+1}: ({x:.4f}, {y:.4f})")
-            else:
-                self.results_text.append("No result returned from transformation.")
+            self.results_text.clear()
+            self.results_text.append("\n".join(header))
+            self.start_worker(matrix, packed)
                 
         except ValueError:
             self.results_text.append("Error: Please enter valid numbers for all parameters.")
         except Exception as e:
             self.results_text.append(f"Error during transformation: {str(e)}")
-            self.results_text.append("Make sure you have imported P2, P3, and Quaternion classes.")
+    
+    def supersede_worker(self):
+        # results of whatever is still running no longer apply
+        if self.active_worker is not None:
+            self.active_worker.cancel()
+            self._worker_done()
+            self.progress_bar.setValue(0)
+        self.transform_generation += 1
+    
+    def start_worker(self, matrix, packed):
+        self.supersede_worker()
+        worker = TransformWorker(self.transform_generation, matrix, packed, self.is_3d_mode)
+        worker.signals.progress.connect(self.on_transform_progress)
+        worker.signals.finished.connect(self.on_transform_finished)
+        worker.signals.failed.connect(self.on_transform_failed)
+        worker.signals.cancelled.connect(self.on_transform_cancelled)
+        self.active_worker = worker
+        self.last_matrix = matrix
+        self.progress_bar.setValue(0)
+        self.cancel_btn.setEnabled(True)
+        self.thread_pool.start(worker)
+    
+    def current_points(self):
+        return self.controller.current3DPoints if self.is_3d_mode else self.controller.current2DPoints
+    
+    def on_slider_moved(self, line_edit, value):
+        line_edit.setText(f"{value:g}")
+        self.request_live_update()
+    
+    def request_live_update(self, *args):
+        if self.live_checkbox.isChecked():
+            self.live_throttle.request()
+    
+    def live_update(self):
+        # runs at most once per frame; reuses one output buffer and the
+        # incremental plot path so scrubbing never builds up a backlog
+        points = self.current_points()
+        if not self.live_checkbox.isChecked() or not points:
+            return
+        try:
+            scale = float(self.scale_input.text())
+            angle = float(self.angle_input.text())
+            tx = float(self.tx_input.text())
+            ty = float(self.ty_input.text())
+            if self.is_3d_mode:
+                tz = float(self.tz_input.text())
+                axis = (float(self.axis_x_input.text()), float(self.axis_y_input.text()),
+                        float(self.axis_z_input.text()))
+                matrix = self.controller.getMatrix3D(scale, axis, angle, tx, ty, tz)
+                packed = self.controller.pack3D()
+            else:
+                matrix = self.controller.getMatrix2D(scale, angle, tx, ty)
+                packed = self.controller.pack2D()
+        except ValueError:
+            return
+        dtype = np.result_type(matrix, packed)
+        if self.live_buffer is None or self.live_buffer.shape != packed.shape or self.live_buffer.dtype != dtype:
+            self.live_buffer = np.empty(packed.shape, dtype=dtype)
+        self.supersede_worker()
+        np.matmul(matrix, packed, out=self.live_buffer)
+        np.round(self.live_buffer, 3, out=self.live_buffer)
+        self.last_matrix = matrix
+        self.visualization.plot_points(points, self.live_buffer)
+    
+    def on_plot_clicked(self, x, y, radius):
+        # nearest original or transformed point within the pick radius; the
+        # transformed side is queried through the remapped spatial index
+        if self.is_3d_mode or not self.controller.current2DPoints:
+            return
+        candidates = []
+        indices, distances = self.controller.spatialIndex2D().knn((x, y), 1)
+        candidates.append((distances[0], indices[0], "original"))
+        if self.last_matrix is not None:
+            indices, distances = self.controller.spatialIndex2D(self.last_matrix).knn((x, y), 1)
+            candidates.append((distances[0], indices[0], "transformed"))
+        distance, row, kind = min(candidates)
+        if distance > radius:
+            return
+        self.points_model.load_through(row)
+        self.points_table.selectRow(row)
+        self.points_table.scrollTo(self.points_model.index(row, 0))
+        coords = self.controller.current2DPoints.array[row]
+        if kind == "transformed":
+            coords = self.last_matrix @ coords
+        self.results_text.append(f"Picked {kind} point {row + 1}: ({coords[0]:.2f}, {coords[1]:.2f})")
+    
+    def cancel_transformation(self):
+        if self.active_worker is not None:
+            self.active_worker.cancel()
+    
+    def _is_current(self, generation):
+        return generation == self.transform_generation
+    
+    def _worker_done(self):
+        self.active_worker = None
+        self.cancel_btn.setEnabled(False)
+    
+    def on_transform_progress(self, generation, done, total):
+        if self._is_current(generation):
+            self.progress_bar.setValue(int(100 * done / total) if total else 100)
+    
+    def on_transform_finished(self, generation, result, text):
+        if not self._is_current(generation):
+            return
+        self._worker_done()
+        self.last_result = result
+        self.results_text.append("\n--- Transformed Points ---")
+        self.results_text.append(text)
+        self.visualization.plot_points(self.current_points(), result)
+    
+    def on_transform_failed(self, generation, message):
+        if not self._is_current(generation):
+            return
+        self._worker_done()
+        self.results_text.append(f"Error during transformation: {message}")
+    
+    def on_transform_cancelled(self, generation):
+        if not self._is_current(generation):
+            return
+        self._worker_done()
+        self.progress_bar.setValue(0)
+        self.results_text.append("Transformation cancelled.")
     
     def clear_results(self):
         self.results_text.clear()
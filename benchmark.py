@@ -0,0 +1,204 @@
+"""Headless benchmarks for the Controller, coordinate and quaternion hot paths.
+
+    python benchmark.py run --sizes 10 1000 100000 10000000 --output new.json
+    python benchmark.py compare base.json new.json --threshold 0.1
+    python benchmark.py imports
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+from controller import Controller
+from coordinates import P2, unique_points
+from quaternions import QuaternionArray
+
+DEFAULT_SIZES = [10, 1000, 100000, 10000000]
+# per-object benchmarks loop in Python, so they stop at this size
+SCALAR_LIMIT = 100000
+
+def _controller(n, rng):
+    c = Controller()
+    c.add2DPoints(rng.random((n, 2)))
+    c.add3DPoints(rng.random((n, 3)))
+    return c
+
+def _quaternions(n, rng):
+    return QuaternionArray.from_axis_angle(rng.random((n, 3)) + 0.1, rng.random(n) * np.pi)
+
+# cold-start budgets in seconds for a fresh interpreter importing the module,
+# and the packages it must not pull in
+IMPORT_BUDGETS = {
+    'controller': (0.5, ('PySide6', 'matplotlib')),
+    'coordinates': (0.5, ('PySide6', 'matplotlib')),
+    'quaternions': (0.5, ('PySide6', 'matplotlib')),
+    'GUI': (1.5, ('matplotlib', 'mpl_toolkits.mplot3d')),
+}
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'loaded': [m for m in {forbidden!r} if m in sys.modules]}}))
+"""
+
+def import_time(module, forbidden = (), repeat = 3):
+    # best of repeat fresh interpreters; numpy is not preloaded, so its own
+    # import is part of every module's cost
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    best, loaded = float('inf'), []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _IMPORT_PROBE.format(module=module, forbidden=tuple(forbidden))],
+                                cwd=here, env=env, capture_output=True, text=True, check=True).stdout
+        probe = json.loads(output.strip().splitlines()[-1])
+        best = min(best, probe['seconds'])
+        loaded = probe['loaded']
+    return best, loaded
+
+def check_imports(budgets = None, repeat = 3, scale = 1.0):
+    # returns (module, seconds, budget, loaded) for every module that went
+    # over budget or imported a package it should not
+    failures = []
+    for module, (budget, forbidden) in (budgets or IMPORT_BUDGETS).items():
+        seconds, loaded = import_time(module, forbidden, repeat)
+        print(f"{module:<16} {seconds * 1000:>8.1f} ms (budget {budget * scale * 1000:.0f} ms)"
+              + (f" loaded {', '.join(loaded)}" if loaded else ""), file=sys.stderr)
+        if seconds > budget * scale or loaded:
+            failures.append((module, seconds, budget * scale, loaded))
+    return failures
+
+def setup_cases(n, rng):
+    # each case returns a zero-argument callable that does the measured work
+    cases = {}
+    c = _controller(n, rng)
+    cases['Controller.pack2D'] = c.pack2D
+    cases['Controller.pack3D'] = c.pack3D
+    cases['Controller.perform2D'] = lambda: c.perform2D(1.5, 30, 1, 2)
+    cases['Controller.perform3D'] = lambda: c.perform3D(0, 1, 1, 1.5, 30, 1, 2, 3)
+    qa, qb = _quaternions(n, rng), _quaternions(n, rng)
+    cases['QuaternionArray.__mul__'] = lambda: qa * qb
+    cases['QuaternionArray.rotation_matrices'] = qa.rotation_matrices
+    duplicated = np.round(rng.random((n, 3)), 2)
+    cases['unique_points'] = lambda: unique_points(duplicated, 1e-9)
+    if n <= SCALAR_LIMIT:
+        left, right = [qa[i] for i in range(n)], [qb[i] for i in range(n)]
+        cases['Quaternion.__mul__'] = lambda: [a * b for a, b in zip(left, right)]
+        cases['Quaternion.rotation_matrix'] = lambda: [q.rotation_matrix() for q in left]
+        pa = [P2(x, y) for x, y in rng.random((n, 2))]
+        pb = [P2(x, y) for x, y in rng.random((n, 2))]
+        cases['Coordinate.__eq__'] = lambda: [a == b for a, b in zip(pa, pb)]
+    return cases
+
+def measure(func, n, repeat):
+    func()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'n': n,
+        'seconds': best,
+        'points_per_sec': n / best if best > 0 else float('inf'),
+        'peak_bytes': peak,
+    }
+
+def run(sizes, repeat = 3, only = None, seed = 0):
+    rng = np.random.default_rng(seed)
+    results = []
+    for n in sizes:
+        for name, func in setup_cases(n, rng).items():
+            if only and not any(pattern in name for pattern in only):
+                continue
+            result = measure(func, n, repeat)
+            result['name'] = name
+            results.append(result)
+            print(f"{name:<36} n={n:<10} {result['points_per_sec']:>14.0f} pts/s "
+                  f"{result['peak_bytes'] / 2 ** 20:>10.2f} MiB", file=sys.stderr)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'timestamp': time.time(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+def compare(base, new, threshold = 0.1):
+    # returns the (name, n, base pts/s, new pts/s) entries that slowed down
+    # by more than threshold
+    baseline = {(r['name'], r['n']): r for r in base['results']}
+    regressions = []
+    for r in new['results']:
+        b = baseline.get((r['name'], r['n']))
+        if b is None:
+            continue
+        if r['points_per_sec'] < b['points_per_sec'] * (1 - threshold):
+            regressions.append((r['name'], r['n'], b['points_per_sec'], r['points_per_sec']))
+    return regressions
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='run the benchmarks and write JSON results')
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--only', nargs='+', help='substrings of benchmark names to run')
+    run_parser.add_argument('--output', '-o', help='JSON file to write, stdout if omitted')
+    compare_parser = commands.add_parser('compare', help='compare two JSON result files')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='allowed fractional drop in points/sec (default 0.1)')
+    imports_parser = commands.add_parser('imports', help='check cold import times against their budgets')
+    imports_parser.add_argument('--repeat', type=int, default=3)
+    imports_parser.add_argument('--scale', type=float, default=1.0,
+                                help='multiply every budget, e.g. for slow CI machines')
+    args = parser.parse_args(argv)
+
+    if args.command == 'imports':
+        failures = check_imports(repeat=args.repeat, scale=args.scale)
+        for module, seconds, budget, loaded in failures:
+            reason = f"loaded {', '.join(loaded)}" if loaded else f"{seconds * 1000:.1f} ms > {budget * 1000:.0f} ms"
+            print(f"OVER BUDGET {module}: {reason}")
+        if not failures:
+            print("All imports within budget")
+        return 1 if failures else 0
+
+    if args.command == 'run':
+        report = run(args.sizes, args.repeat, args.only)
+        text = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(text)
+        else:
+            print(text)
+        return 0
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    regressions = compare(base, new, args.threshold)
+    for name, n, before, after in regressions:
+        print(f"REGRESSION {name} n={n}: {before:.0f} -> {after:.0f} pts/s ({after / before - 1:+.1%})")
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
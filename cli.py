@@ -0,0 +1,178 @@
+"""Headless batch transforms, chunk by chunk, with the perform2D/perform3D parameters.
+
+    python cli.py 2d --scale 2 --angle 30 --tx 1 --ty 2 -i points.csv -o out.npy
+    cat points.csv | python cli.py 3d --axis 0 0 1 --angle 90 --out-format raw > out.bin
+    python cli.py manifest jobs.json
+
+A manifest is a JSON list of jobs, or {"defaults": {...}, "jobs": [...]}; each
+job uses the option names below (mode, input, output, scale, angle, axis, tx,
+ty, tz, in_format, out_format, dtype, chunk_size, decimals). All jobs run in one
+process and share a Controller, so its matrix cache carries across jobs.
+"""
+import argparse
+import json
+import sys
+import numpy as np
+
+from controller import Controller
+import streaming
+
+FORMATS = ('csv', 'npy', 'raw')
+
+JOB_DEFAULTS = {
+    'mode': '2d',
+    'input': '-',
+    'output': '-',
+    'scale': 1.0,
+    'angle': 0.0,
+    'axis': (0.0, 0.0, 1.0),
+    'tx': 0.0,
+    'ty': 0.0,
+    'tz': 0.0,
+    'in_format': None,
+    'out_format': None,
+    'dtype': None,
+    'chunk_size': streaming.DEFAULT_CHUNK,
+    'decimals': 3,
+}
+
+NUMBER_KEYS = ('scale', 'angle', 'tx', 'ty', 'tz')
+
+def _number(key, value, kind = float):
+    if isinstance(value, bool):
+        raise ValueError(f"{key} must be a number, got {value!r}")
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be a number, got {value!r}") from None
+
+def validate_job(job):
+    # a job with every field coerced to the type it is used as; bad values
+    # raise ValueError so a manifest can report the job and carry on
+    unknown = set(job) - set(JOB_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown job keys: {', '.join(sorted(unknown))}")
+    job = dict(JOB_DEFAULTS, **job)
+    for key in NUMBER_KEYS:
+        job[key] = _number(key, job[key])
+    axis = job['axis']
+    if isinstance(axis, (str, bytes)) or not hasattr(axis, '__len__') or len(axis) != 3:
+        raise ValueError(f"axis must be a list of 3 numbers, got {axis!r}")
+    job['axis'] = tuple(_number('axis', value) for value in axis)
+    job['chunk_size'] = _number('chunk_size', job['chunk_size'], int)
+    if job['chunk_size'] < 1:
+        raise ValueError(f"chunk_size must be positive, got {job['chunk_size']}")
+    if job['decimals'] is not None:
+        job['decimals'] = _number('decimals', job['decimals'], int)
+    for key in ('in_format', 'out_format'):
+        if job[key] is not None and job[key] not in FORMATS:
+            raise ValueError(f"{key} must be one of {', '.join(FORMATS)}, got {job[key]!r}")
+    if job['dtype'] is not None and job['dtype'] not in ('float32', 'float64'):
+        raise ValueError(f"dtype must be float32 or float64, got {job['dtype']!r}")
+    for key in ('input', 'output'):
+        if not isinstance(job[key], str):
+            raise ValueError(f"{key} must be a path or '-', got {job[key]!r}")
+    return job
+
+def build_matrix(controller, job):
+    if job['mode'] == '2d':
+        return controller.getMatrix2D(job['scale'], job['angle'], job['tx'], job['ty'])
+    if job['mode'] == '3d':
+        return controller.getMatrix3D(job['scale'], job['axis'], job['angle'], job['tx'], job['ty'], job['tz'])
+    raise ValueError(f"Unknown mode: {job['mode']}")
+
+def run_job(controller, job, stdin = None, stdout = None):
+    # returns the number of points written; '-' stands for stdin/stdout
+    job = validate_job(job)
+    matrix = build_matrix(controller, job)
+    source = (stdin or sys.stdin) if job['input'] == '-' else job['input']
+    destination = (stdout or sys.stdout) if job['output'] == '-' else job['output']
+    dtype = None if job['dtype'] is None else np.dtype(job['dtype'])
+    return streaming.transform_file(source, destination, matrix, job['chunk_size'],
+                                    job['in_format'], job['out_format'], dtype, job['decimals'])
+
+def load_manifest(path, defaults = None):
+    with open(path) as f:
+        manifest = json.load(f)
+    defaults = dict(defaults or {})
+    if isinstance(manifest, dict):
+        if not isinstance(manifest.get('defaults', {}), dict):
+            raise ValueError("Manifest defaults must be an object")
+        defaults.update(manifest.get('defaults', {}))
+        manifest = manifest.get('jobs', [])
+    if not isinstance(manifest, list):
+        raise ValueError("Manifest jobs must be a list")
+    for i, job in enumerate(manifest):
+        if not isinstance(job, dict):
+            raise ValueError(f"Manifest job {i} must be an object, got {job!r}")
+    return [dict(defaults, **job) for job in manifest]
+
+def run_manifest(jobs, controller = None):
+    # failing jobs are reported and skipped; returns the number that failed
+    controller = controller or Controller()
+    failed = 0
+    for i, job in enumerate(jobs):
+        try:
+            count = run_job(controller, job)
+        except (OSError, ValueError) as e:
+            failed += 1
+            print(f"job {i}: failed: {e}", file=sys.stderr)
+            continue
+        print(f"job {i}: {count} points -> {job.get('output', '-')}", file=sys.stderr)
+    return failed
+
+def _add_io_arguments(parser):
+    parser.add_argument('--input', '-i', default='-', help="points file, '-' for stdin (default)")
+    parser.add_argument('--output', '-o', default='-', help="output file, '-' for stdout (default)")
+    parser.add_argument('--in-format', choices=FORMATS, help='input format, inferred from the extension')
+    parser.add_argument('--out-format', choices=FORMATS, help='output format, inferred from the extension')
+    parser.add_argument('--dtype', choices=('float32', 'float64'),
+                        help='element type of raw/.npy output and raw input (default: the precision setting)')
+    parser.add_argument('--chunk-size', type=int, default=streaming.DEFAULT_CHUNK)
+    parser.add_argument('--decimals', type=int, default=3)
+    parser.add_argument('--no-round', action='store_true', help='skip rounding to --decimals')
+
+def _add_transform_arguments(parser, is_3d):
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--angle', type=float, default=0.0, help='rotation in degrees')
+    if is_3d:
+        parser.add_argument('--axis', type=float, nargs=3, default=(0.0, 0.0, 1.0), metavar=('X', 'Y', 'Z'))
+    parser.add_argument('--tx', type=float, default=0.0)
+    parser.add_argument('--ty', type=float, default=0.0)
+    if is_3d:
+        parser.add_argument('--tz', type=float, default=0.0)
+
+def _job_from_args(args):
+    job = {key: value for key, value in vars(args).items() if key in JOB_DEFAULTS and value is not None}
+    if args.no_round:
+        job['decimals'] = None
+    return job
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='mode', required=True)
+    for mode in ('2d', '3d'):
+        mode_parser = commands.add_parser(mode, help=f'transform {mode.upper()} points')
+        _add_transform_arguments(mode_parser, mode == '3d')
+        _add_io_arguments(mode_parser)
+    manifest_parser = commands.add_parser('manifest', help='run every job of a JSON manifest')
+    manifest_parser.add_argument('manifest')
+    args = parser.parse_args(argv)
+
+    if args.mode == 'manifest':
+        try:
+            jobs = load_manifest(args.manifest)
+        except (OSError, ValueError) as e:
+            print(f"Cannot read manifest: {e}", file=sys.stderr)
+            return 2
+        return 1 if run_manifest(jobs) else 0
+
+    try:
+        run_job(Controller(), _job_from_args(args))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,68 +1,118 @@
-from quaternions import Quaternion
-from coordinates import P2, P3
+from quaternions import Quaternion, QuaternionArray
+from coordinates import dehomogenize
+from pointstore import PointStore
+from matrixcache import MatrixCache
+from precision import get_dtype
+from spatial import GridIndex
+import streaming
+import time
 import numpy as np
 
 class Controller:
-    def __init__(self):
-        self.current2DPoints = []
-        self.current3DPoints = []
+    def __init__(self, cache_size = 128):
+        self.current2DPoints = PointStore(2)
+        self.current3DPoints = PointStore(3)
+        self.matrixCache = MatrixCache(cache_size)
+        self.instrumentation = None
+        self._spatialIndexes = {}
+
+    def _stage(self, stage, factory):
+        # only cache misses reach the factory, so stages time real work
+        if self.instrumentation is None:
+            return factory
+        return self.instrumentation.wrap(stage, factory)
+
+    def _cached(self, key, factory):
+        dtype = get_dtype()
+        return self.matrixCache.get(key + (dtype.str,), lambda: np.asarray(factory(), dtype=dtype))
 
     def add2DPoint(self, x, y):
-        self.current2DPoints.append(P2(x, y))
+        self.current2DPoints.append((x, y))
+
+    def add2DPoints(self, points):
+        self.current2DPoints.add_points(points)
 
     def rotationMatrix2D(self, angle):
-        angle = np.radians(angle)
-        return np.array([[np.cos(angle), -np.sin(angle), 0], 
-                         [np.sin(angle),  np.cos(angle), 0],
-                         [0,              0,             0]], dtype=np.float16)
+        return self._cached(('rotation2D', float(angle)), self._stage('rotation', lambda: _rotation2D(angle)))
     
     def scale2DMatrix(self, s):
-        return s * np.identity(3)
+        return self._cached(('scale2D', float(s)), lambda: s * np.identity(3))
     
     def translate2D(self, x, y):
-        matrix = np.zeros(shape =(3, 3))
-        matrix[0, -1] = x
-        matrix[1, -1] = y
-        matrix[2, -1] = 1
-        return matrix
+        return self._cached(('translate2D', float(x), float(y)), lambda: _translation(x, y))
     
     def getMatrix2D(self, s, angle, x, y):
+        key = ('matrix2D', float(s), float(angle), float(x), float(y))
+        return self._cached(key, self._stage('compose', lambda: self._buildMatrix2D(s, angle, x, y)))
+
+    def _buildMatrix2D(self, s, angle, x, y):
         scaled_angle = np.matmul(self.scale2DMatrix(s), self.rotationMatrix2D(angle))
-        print(scaled_angle)
         return scaled_angle + self.translate2D(x, y)
     
     def pack2D(self):
-        package = []
-        for coord in self.current2DPoints:
-            np_arr = coord.to_homogeneous().reshape(-1, 1)     
-            package.append(np_arr)
-        return np.hstack(package)
+        return self.current2DPoints.packed()
     
-    def perform2D(self, scale = 1, angleDegrees = 0, tx = 0, ty = 0):
+    def perform2D(self, scale = 1, angleDegrees = 0, tx = 0, ty = 0, executor = None, out = None, decimals = 3):
+        inst = self.instrumentation
+        if inst is None:
+            matrix = self.getMatrix2D(scale, angleDegrees, tx, ty)
+            return _perform(matrix, self.pack2D(), executor, out, decimals)
+        matrix = inst.time('matrix', self.getMatrix2D, scale, angleDegrees, tx, ty)
+        return _perform(matrix, inst.time('pack', self.pack2D), executor, out, decimals, inst)
+
+    def getMatrix2D_batch(self, scales, angles, xs, ys):
+        scales, angles, xs, ys = _broadcast_params(scales, angles, xs, ys)
+        rad = np.radians(angles)
+        cos = scales * np.cos(rad)
+        sin = scales * np.sin(rad)
+        matrices = np.zeros((scales.shape[0], 3, 3), dtype=get_dtype())
+        matrices[:, 0, 0] = cos
+        matrices[:, 0, 1] = -sin
+        matrices[:, 1, 0] = sin
+        matrices[:, 1, 1] = cos
+        matrices[:, 0, 2] = xs
+        matrices[:, 1, 2] = ys
+        matrices[:, 2, 2] = 1
+        return matrices
+
+    def perform2D_batch(self, scales = 1, anglesDegrees = 0, txs = 0, tys = 0, out = None, decimals = 3):
+        matrices = self.getMatrix2D_batch(scales, anglesDegrees, txs, tys)
+        return _perform_batch(matrices, self.pack2D(), out, decimals)
+
+    def performAffine2D(self, matrix, out = None, decimals = 3):
+        return _perform(_affine_matrix(matrix, 2), self.pack2D(), out=out, decimals=decimals)
+
+    def performProjective2D(self, matrix, mode = 'mask', eps = 1e-12, out = None, decimals = 3):
+        return _perform_projective(_projective_matrix(matrix, 2), self.pack2D(), mode, eps, out, decimals)
+
+    def stream2D(self, source, scale = 1, angleDegrees = 0, tx = 0, ty = 0, chunk_size = streaming.DEFAULT_CHUNK, fmt = None):
         matrix = self.getMatrix2D(scale, angleDegrees, tx, ty)
-        return np.round(np.matmul(matrix, self.pack2D()), 3)
+        return streaming.transform_chunks(streaming.read_chunks(source, 2, chunk_size, fmt), matrix)
 
     def add3DPoint(self, x, y, z):
-        self.current3DPoints.append(P3(x, y, z))
+        self.current3DPoints.append((x, y, z))
+
+    def add3DPoints(self, points):
+        self.current3DPoints.add_points(points)
 
     def rotationMatrix3D(self, x, y, z, angle):
-        return Quaternion(x, y, z, angle).r
+        key = ('rotation3D', float(x), float(y), float(z), float(angle))
+        return self._cached(key, self._stage('quaternion', lambda: Quaternion(x, y, z, angle).r))
     
     def scale3DMatrix(self, s):
-        return s * np.identity(4)
+        return self._cached(('scale3D', float(s)), lambda: s * np.identity(4))
     
     def translate3D(self, x, y, z):
-        matrix = np.zeros(shape =(4, 4))
-        matrix[0, -1] = x
-        matrix[1, -1] = y
-        matrix[2, -1] = z
-        matrix[3, -1] = 1
-        return matrix
+        return self._cached(('translate3D', float(x), float(y), float(z)), lambda: _translation(x, y, z))
     
     def getMatrix3D(self, s, axis, angle, x, y, z):
+        key = ('matrix3D', float(s)) + tuple(float(a) for a in axis) + (float(angle), float(x), float(y), float(z))
+        return self._cached(key, self._stage('compose', lambda: self._buildMatrix3D(s, axis, angle, x, y, z)))
+
+    def _buildMatrix3D(self, s, axis, angle, x, y, z):
         scaled = self.scale3DMatrix(s)
         # print(scaled)
-        rot = np.zeros((4, 4))
+        rot = np.zeros((4, 4), dtype=get_dtype())
         rot[:3, :3] = self.rotationMatrix3D(*axis, np.deg2rad(angle))
         # print(rot)
         scaled_angle = np.matmul(scaled, rot)
@@ -70,15 +120,145 @@ class Controller:
         return scaled_angle + self.translate3D(x, y, z)
     
     def pack3D(self):
-        package = []
-        for coord in self.current3DPoints:
-            np_arr = coord.to_homogeneous().reshape(-1, 1)     
-            package.append(np_arr)
-        return np.hstack(package)
+        return self.current3DPoints.packed()
     
-    def perform3D(self, axisX, axisY, axisZ, scale = 1, angleDegrees = 0, tx = 0, ty = 0, tz = 0):
+    def perform3D(self, axisX, axisY, axisZ, scale = 1, angleDegrees = 0, tx = 0, ty = 0, tz = 0, executor = None, out = None, decimals = 3):
+        inst = self.instrumentation
+        if inst is None:
+            matrix = self.getMatrix3D(scale, (axisX, axisY, axisZ), angleDegrees, tx, ty, tz)
+            return _perform(matrix, self.pack3D(), executor, out, decimals)
+        matrix = inst.time('matrix', self.getMatrix3D, scale, (axisX, axisY, axisZ), angleDegrees, tx, ty, tz)
+        return _perform(matrix, inst.time('pack', self.pack3D), executor, out, decimals, inst)
+
+    def rotationMatrix3D_batch(self, axes, angles):
+        return QuaternionArray.from_axis_angle(axes, angles).rotation_matrices()
+
+    def getMatrix3D_batch(self, scales, axes, angles, xs, ys, zs):
+        scales, angles, xs, ys, zs = _broadcast_params(scales, angles, xs, ys, zs)
+        rot = self.rotationMatrix3D_batch(axes, np.deg2rad(angles))
+        k = max(scales.shape[0], rot.shape[0])
+        matrices = np.zeros((k, 4, 4), dtype=get_dtype())
+        matrices[:, :3, :3] = scales[:, None, None] * rot
+        matrices[:, 0, 3] = xs
+        matrices[:, 1, 3] = ys
+        matrices[:, 2, 3] = zs
+        matrices[:, 3, 3] = 1
+        return matrices
+
+    def perform3D_batch(self, axes, scales = 1, anglesDegrees = 0, txs = 0, tys = 0, tzs = 0, out = None, decimals = 3):
+        matrices = self.getMatrix3D_batch(scales, axes, anglesDegrees, txs, tys, tzs)
+        return _perform_batch(matrices, self.pack3D(), out, decimals)
+
+    def performAffine3D(self, matrix, out = None, decimals = 3):
+        return _perform(_affine_matrix(matrix, 3), self.pack3D(), out=out, decimals=decimals)
+
+    def performProjective3D(self, matrix, mode = 'mask', eps = 1e-12, out = None, decimals = 3):
+        return _perform_projective(_projective_matrix(matrix, 3), self.pack3D(), mode, eps, out, decimals)
+
+    def spatialIndex2D(self, matrix = None):
+        return self._spatialIndex(self.current2DPoints, matrix)
+
+    def spatialIndex3D(self, matrix = None):
+        return self._spatialIndex(self.current3DPoints, matrix)
+
+    def _spatialIndex(self, store, matrix):
+        # the index over the original points follows the store: appends are
+        # added to it and only removals rebuild it; with a matrix, queries run
+        # against the transformed points (remapped for similarities)
+        index, resets = self._spatialIndexes.get(store.dim, (None, None))
+        if index is None or resets != store.resets:
+            index = GridIndex(dehomogenize(store.array, axis=1)[:, :store.dim])
+        elif len(index) < len(store):
+            index.append(dehomogenize(store.array[len(index):], axis=1)[:, :store.dim])
+        self._spatialIndexes[store.dim] = (index, store.resets)
+        return index if matrix is None else index.transformed(matrix)
+
+    def stream3D(self, source, axisX, axisY, axisZ, scale = 1, angleDegrees = 0, tx = 0, ty = 0, tz = 0, chunk_size = streaming.DEFAULT_CHUNK, fmt = None):
         matrix = self.getMatrix3D(scale, (axisX, axisY, axisZ), angleDegrees, tx, ty, tz)
-        return np.round(np.matmul(matrix, self.pack3D()), 3)
+        return streaming.transform_chunks(streaming.read_chunks(source, 3, chunk_size, fmt), matrix)
+
+
+def _rotation2D(angle):
+    angle = np.radians(angle)
+    return np.array([[np.cos(angle), -np.sin(angle), 0], 
+                     [np.sin(angle),  np.cos(angle), 0],
+                     [0,              0,             0]], dtype=get_dtype())
+
+
+def _translation(*offset):
+    matrix = np.zeros(shape =(len(offset) + 1, len(offset) + 1), dtype=get_dtype())
+    matrix[:-1, -1] = offset
+    matrix[-1, -1] = 1
+    return matrix
+
+
+def _broadcast_params(*params):
+    arrays = np.broadcast_arrays(*[np.asarray(p, dtype=np.float64) for p in params])
+    return [a.reshape(-1) for a in arrays]
+
+
+def _perform(matrix, points, executor = None, out = None, decimals = 3, inst = None):
+    # with a preallocated out buffer the matmul and rounding run in place
+    if inst is not None:
+        return _perform_instrumented(matrix, points, executor, out, decimals, inst)
+    if executor is not None:
+        return executor.transform(matrix, points, out=out, decimals=decimals)
+    result = np.matmul(matrix, points, out=out)
+    if decimals is not None:
+        np.round(result, decimals, out=result)
+    return result
+
+
+def _perform_instrumented(matrix, points, executor, out, decimals, inst):
+    n = points.shape[-1]
+    start = time.perf_counter()
+    if executor is not None:
+        result = executor.transform(matrix, points, out=out, decimals=decimals)
+        inst.record('sharded', time.perf_counter() - start, n, 0 if out is not None else result.nbytes)
+        return result
+    result = np.matmul(matrix, points, out=out)
+    inst.record('matmul', time.perf_counter() - start, n, 0 if out is not None else result.nbytes)
+    if decimals is not None:
+        start = time.perf_counter()
+        np.round(result, decimals, out=result)
+        inst.record('round', time.perf_counter() - start, n)
+    return result
+
+
+def _projective_matrix(matrix, dim):
+    matrix = np.asarray(matrix, dtype=get_dtype())
+    if matrix.shape != (dim + 1, dim + 1):
+        raise ValueError(f"Expected a {dim + 1}x{dim + 1} matrix, got {matrix.shape}")
+    return matrix
+
+
+def _affine_matrix(matrix, dim):
+    matrix = _projective_matrix(matrix, dim)
+    if np.any(matrix[-1, :-1] != 0) or matrix[-1, -1] == 0:
+        raise ValueError("Affine matrices must have a last row of the form [0, ..., 0, c] with c != 0")
+    if matrix[-1, -1] != 1:
+        matrix = matrix / matrix[-1, -1]
+    return matrix
+
+
+def _perform_projective(matrix, points, mode, eps, out, decimals):
+    result = np.matmul(matrix, points, out=out)
+    dehomogenize(result, axis=0, eps=eps, mode=mode, out=result)
+    if decimals is not None:
+        np.round(result, decimals, out=result)
+    return result
+
+
+def _perform_batch(matrices, points, out = None, decimals = 3):
+    # K x d x d stack against one d x N point block, written straight into
+    # one K x d x N result; that result is the whole memory cost, so pass
+    # out to reuse it across calls
+    if out is None:
+        out = np.empty((matrices.shape[0],) + points.shape, dtype=np.result_type(matrices, points))
+    np.matmul(matrices, points, out=out)
+    if decimals is not None:
+        np.round(out, decimals, out=out)
+    return out
 
 if __name__ == "__main__":
     c = Controller()
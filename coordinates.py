@@ -1,43 +1,231 @@
+from precision import get_dtype
+import numbers
 import numpy as np
 
 class Coordinate:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
+    """A homogeneous point stored as one row of a shared array.
+
+    Instances only hold the buffer and a row index, so attribute reads and
+    writes go straight to the array. The buffer is either a plain N x (d + 1)
+    array or an object with an `array` attribute (e.g. a PointStore), which
+    keeps views valid when the store reallocates as it grows. Writes through
+    the setters tell such a store that its rows changed; writing into the
+    array returned by `vec` in place does not.
+    """
+    __slots__ = ('_buffer', '_row')
+
+    def __init__(self, *values):
+        self._buffer = np.array([values], dtype=get_dtype())
+        self._row = 0
+
+    @classmethod
+    def view(cls, buffer, row):
+        point = object.__new__(cls)
+        point._buffer = buffer
+        point._row = row
+        return point
+
+    @classmethod
+    def views(cls, buffer):
+        rows = buffer if isinstance(buffer, np.ndarray) else buffer.array
+        return [cls.view(buffer, row) for row in range(rows.shape[0])]
+
+    def _rows(self):
+        buffer = self._buffer
+        return buffer if isinstance(buffer, np.ndarray) else buffer.array
+
+    def _set(self, column, value):
+        buffer = self._buffer
+        if isinstance(buffer, np.ndarray):
+            buffer[self._row, column] = value
+        else:
+            buffer.array[self._row, column] = value
+            buffer.modified()
+
+    @property
+    def vec(self):
+        return self._rows()[self._row]
+
+    @vec.setter
+    def vec(self, value):
+        self._set(slice(None), value)
+
+    @property
+    def x(self):
+        return self._rows()[self._row, 0]
+
+    @x.setter
+    def x(self, value):
+        self._set(0, value)
+
+    @property
+    def y(self):
+        return self._rows()[self._row, 1]
+
+    @y.setter
+    def y(self, value):
+        self._set(1, value)
+
+    @property
+    def w(self):
+        return self._rows()[self._row, -1]
+
+    @w.setter
+    def w(self, value):
+        self._set(-1, value)
+
+    def __rmul__(self, other):
+        # scales the coordinates and leaves w alone
+        if not isinstance(other, numbers.Real):
+            return NotImplemented
+        vec = self.vec.copy()
+        vec[:-1] *= other
+        return type(self)(*vec)
+
+    __mul__ = __rmul__
 
     def augment(self):
         return self.vec / self.vec[-1]
     
     def to_inhomogeneous(self):
-        return np.array([value/self.vec[-1] for value in self.vec[:-1]], dtype=np.float32)
+        return (self.vec[:-1] / self.vec[-1]).astype(get_dtype(), copy=False)
     
     def to_homogeneous(self):
         return self.vec
     
     def __eq__(self, value):
-        if isinstance(value, type(self)):
-            a1 = self.augment()
-            a2 = value.augment()
-            return all([a1[i] == a2[i] for i in range(len(self.vec[:-1]))])
-        raise TypeError("Type error on equation operator")
+        # exact equality after the homogeneous divide; P2 and P3 never match
+        if not isinstance(value, Coordinate):
+            raise TypeError("Type error on equation operator")
+        # two rows are cheaper to compare as Python floats than as arrays
+        a, b = self.vec.tolist(), value.vec.tolist()
+        if len(a) != len(b):
+            return False
+        wa, wb = a[-1], b[-1]
+        return all(x / wa == y / wb for x, y in zip(a[:-1], b[:-1]))
+
+    def __hash__(self):
+        return hash(tuple(self.to_inhomogeneous().tolist()))
+
+    def isclose(self, value, rtol = 1e-9, atol = 1e-12):
+        if len(self.vec) != len(value.vec):
+            return False
+        return bool(isclose(self.vec, value.vec, rtol, atol, homogeneous=True))
     
+def dehomogenize(points, axis = 0, eps = 1e-12, mode = 'mask', out = None):
+    # perspective divide of a whole array of homogeneous points at once;
+    # points whose w is within eps of zero become NaN ('mask') or are
+    # divided by +/-eps instead ('clip')
+    points = np.asarray(points)
+    w = np.expand_dims(np.take(points, -1, axis=axis), axis)
+    small = np.abs(w) < eps
+    if mode == 'mask':
+        w = np.where(small, np.nan, w)
+    elif mode == 'clip':
+        w = np.where(small, np.where(w < 0, -eps, eps), w)
+    else:
+        raise ValueError(f"Unknown dehomogenize mode: {mode}")
+    return np.divide(points, w, out=out)
+
+def _inhomogeneous_rows(points, homogeneous):
+    # N x d rows; homogeneous input is N x (d + 1) and divided through by w
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim == 1:
+        points = points.reshape(1, -1)
+    if homogeneous:
+        points = dehomogenize(points, axis=-1)[..., :-1]
+    return points
+
+def isclose(a, b, rtol = 1e-9, atol = 1e-12, homogeneous = False):
+    # elementwise approximate equality of two broadcastable point arrays
+    # (one point per row), all coordinates of a row must match; rows with w
+    # near zero never compare equal
+    a = _inhomogeneous_rows(a, homogeneous)
+    b = _inhomogeneous_rows(b, homogeneous)
+    result = np.all(np.isclose(a, b, rtol=rtol, atol=atol), axis=-1)
+    return result if result.shape != (1,) else result[0]
+
+def point_keys(points, tol = 1e-9, homogeneous = False):
+    # integer grid coordinates of each row at resolution tol; points that
+    # round to the same multiple of tol share a key
+    points = _inhomogeneous_rows(points, homogeneous)
+    if not np.all(np.isfinite(points)):
+        raise ValueError("Point keys need finite coordinates (no points at infinity)")
+    scaled = np.round(points / tol)
+    if scaled.size and np.abs(scaled).max() >= 2.0 ** 62:
+        raise ValueError(f"Tolerance {tol} is too fine for coordinates of this magnitude")
+    return scaled.astype(np.int64)
+
+_HASH_MULTIPLIERS = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93],
+                             dtype=np.uint64)
+
+def _group_rows(keys):
+    # (order, group of each row) with equal key rows in one group; rows are
+    # hashed to one 64-bit value and sorted once, and the rare hash collision
+    # falls back to a lexicographic sort of the full rows
+    n = keys.shape[0]
+    if n == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    mixed = keys.view(np.uint64) * _HASH_MULTIPLIERS[:keys.shape[1]]
+    hashes = np.bitwise_xor.reduce(mixed ^ (mixed >> np.uint64(29)), axis=1)
+    order = np.argsort(hashes, kind='stable')
+    same_hash = hashes[order][1:] == hashes[order][:-1]
+    same_row = np.all(keys[order][1:] == keys[order][:-1], axis=1)
+    if np.any(same_hash & ~same_row):
+        order = np.lexsort(keys.T[::-1])
+        same_row = np.all(keys[order][1:] == keys[order][:-1], axis=1)
+    group = np.empty(n, dtype=np.intp)
+    group[order] = np.r_[0, np.cumsum(~same_row)]
+    return order, group
+
+def unique_points(points, tol = 1e-9, homogeneous = False, return_index = False):
+    # the first of every set of duplicate rows, in input order
+    rows = np.asarray(points)
+    order, group = _group_rows(point_keys(rows, tol, homogeneous))
+    # both sorts are stable, so each group starts with its first occurrence
+    grouped = group[order]
+    index = np.sort(order[np.r_[0, np.flatnonzero(grouped[1:] != grouped[:-1]) + 1]]) if order.size else order
+    return (rows[index], index) if return_index else rows[index]
+
+def _membership(a, b, tol, homogeneous):
+    # for each row of a, whether some row of b shares its key
+    a = np.asarray(a)
+    keys = np.concatenate([point_keys(a, tol, homogeneous), point_keys(b, tol, homogeneous)])
+    _, group = _group_rows(keys)
+    in_b = np.zeros(group.max() + 1 if group.size else 0, dtype=bool)
+    in_b[group[a.shape[0]:]] = True
+    return in_b[group[:a.shape[0]]]
+
+def union_points(a, b, tol = 1e-9, homogeneous = False):
+    return unique_points(np.concatenate([np.asarray(a), np.asarray(b)]), tol, homogeneous)
+
+def intersect_points(a, b, tol = 1e-9, homogeneous = False):
+    a = unique_points(a, tol, homogeneous)
+    return a[_membership(a, b, tol, homogeneous)]
+
+def difference_points(a, b, tol = 1e-9, homogeneous = False):
+    a = unique_points(a, tol, homogeneous)
+    return a[~_membership(a, b, tol, homogeneous)]
+
 class P2(Coordinate):
-    def __init__(self, x, y, w = 1):
-        super().__init__(x, y)
-        self.vec = np.array([x, y, w], dtype=np.float32)
+    __slots__ = ()
 
-    def __rmul__(self, other):
-        if isinstance(other, int):
-            new_vec = other * self.vec
-            new_vec[-1] /= other
-            x, y, w = new_vec
-        return P2(x, y, w)
+    def __init__(self, x, y, w = 1):
+        super().__init__(x, y, w)
     
 class P3(Coordinate):
+    __slots__ = ()
+
     def __init__(self, x, y, z, w = 1):
-        super().__init__(x, y)
-        self.z = z
-        self.vec = np.array([x, y, z, w], dtype=np.float32)
+        super().__init__(x, y, z, w)
+
+    @property
+    def z(self):
+        return self._rows()[self._row, 2]
+
+    @z.setter
+    def z(self, value):
+        self._set(2, value)
 
 
 
@@ -0,0 +1,138 @@
+import numpy as np
+
+def _homogeneous_matrix(linear, translation):
+    d = linear.shape[-1]
+    matrix = np.zeros(linear.shape[:-2] + (d + 1, d + 1))
+    matrix[..., :d, :d] = linear
+    matrix[..., :d, d] = translation
+    matrix[..., d, d] = 1
+    return matrix
+
+def estimate_similarity(src, dst, with_scale = True):
+    # Umeyama's least-squares similarity; src/dst are (..., N, d) so stacks
+    # of point sets are solved together
+    src = np.asarray(src, dtype=np.float64)
+    dst = np.asarray(dst, dtype=np.float64)
+    n, d = src.shape[-2:]
+    mu_src = src.mean(axis=-2, keepdims=True)
+    mu_dst = dst.mean(axis=-2, keepdims=True)
+    xs = src - mu_src
+    xd = dst - mu_dst
+    cov = np.matmul(np.swapaxes(xd, -1, -2), xs) / n
+    u, s, vt = np.linalg.svd(cov)
+    sign = np.sign(np.linalg.det(u) * np.linalg.det(vt))
+    sign = np.where(sign == 0, 1, sign)
+    signs = np.ones(s.shape)
+    signs[..., -1] = sign
+    rotation = np.matmul(u, signs[..., :, None] * vt)
+    if with_scale:
+        variance = np.sum(xs ** 2, axis=(-2, -1)) / n
+        scale = np.sum(s * signs, axis=-1) / np.where(variance == 0, 1, variance)
+    else:
+        scale = np.ones(s.shape[:-1])
+    linear = scale[..., None, None] * rotation
+    translation = mu_dst[..., 0, :] - np.matmul(linear, mu_src[..., 0, :, None])[..., 0]
+    return _homogeneous_matrix(linear, translation)
+
+def estimate_affine(src, dst):
+    src = np.asarray(src, dtype=np.float64)
+    dst = np.asarray(dst, dtype=np.float64)
+    ones = np.ones(src.shape[:-1] + (1,))
+    solution = np.matmul(np.linalg.pinv(np.concatenate([src, ones], axis=-1)), dst)
+    linear = np.swapaxes(solution[..., :-1, :], -1, -2)
+    return _homogeneous_matrix(linear, solution[..., -1, :])
+
+def _normalizing_transform(points):
+    # Hartley normalization: centroid to the origin, mean distance sqrt(d)
+    d = points.shape[-1]
+    centroid = points.mean(axis=-2)
+    distance = np.linalg.norm(points - centroid[..., None, :], axis=-1).mean(axis=-1)
+    scale = np.sqrt(d) / np.where(distance == 0, 1, distance)
+    linear = scale[..., None, None] * np.identity(d)
+    return _homogeneous_matrix(linear, -scale[..., None] * centroid)
+
+def estimate_projective(src, dst):
+    # normalized DLT; each point gives d equations dst_j * (h_d . x) - h_j . x = 0
+    src = np.asarray(src, dtype=np.float64)
+    dst = np.asarray(dst, dtype=np.float64)
+    n, d = src.shape[-2:]
+    t_src = _normalizing_transform(src)
+    t_dst = _normalizing_transform(dst)
+    ones = np.ones(src.shape[:-1] + (1,))
+    xs = np.matmul(np.concatenate([src, ones], axis=-1), np.swapaxes(t_src, -1, -2))
+    xd = np.matmul(np.concatenate([dst, ones], axis=-1), np.swapaxes(t_dst, -1, -2))
+    xd = xd[..., :d] / xd[..., d:]
+    a = np.zeros(src.shape[:-2] + (n, d, d + 1, d + 1))
+    for j in range(d):
+        a[..., :, j, j, :] = -xs
+        a[..., :, j, d, :] = xd[..., j:j + 1] * xs
+    a = a.reshape(src.shape[:-2] + (n * d, (d + 1) ** 2))
+    _, _, vt = np.linalg.svd(a)
+    h = vt[..., -1, :].reshape(src.shape[:-2] + (d + 1, d + 1))
+    matrix = np.matmul(np.linalg.inv(t_dst), np.matmul(h, t_src))
+    last = matrix[..., d:, d:]
+    return matrix / np.where(np.abs(last) < 1e-12, 1, last)
+
+ESTIMATORS = {
+    'similarity': estimate_similarity,
+    'affine': estimate_affine,
+    'projective': estimate_projective,
+}
+
+def minimal_sample_size(model, dim):
+    return {'similarity': dim, 'affine': dim + 1, 'projective': dim + 2}[model]
+
+def estimate(src, dst, model = 'similarity'):
+    if model not in ESTIMATORS:
+        raise ValueError(f"Unknown model: {model}")
+    return ESTIMATORS[model](src, dst)
+
+def residuals(matrices, src, dst):
+    # K x N transfer errors of every hypothesis on every correspondence
+    d = src.shape[-1]
+    mapped = np.einsum('kij,nj->kni', matrices[..., :d, :d], src) + matrices[:, None, :d, d]
+    w = np.einsum('kj,nj->kn', matrices[:, d, :d], src) + matrices[:, None, d, d]
+    mapped /= np.where(np.abs(w) < 1e-12, np.nan, w)[..., None]
+    return np.linalg.norm(mapped - dst, axis=-1)
+
+def ransac(src, dst, model = 'similarity', threshold = 1e-2, iterations = 1000, batch_size = 256, seed = None):
+    # all hypotheses of a batch are fitted and scored together; returns the
+    # refit matrix and the inlier mask of the best hypothesis
+    src = np.asarray(src, dtype=np.float64)
+    dst = np.asarray(dst, dtype=np.float64)
+    n, d = src.shape
+    m = minimal_sample_size(model, d)
+    if n < m:
+        raise ValueError(f"A {model} model needs at least {m} correspondences, got {n}")
+    # bound the K x N x d residual block to roughly 16M elements
+    batch_size = max(1, min(batch_size, (1 << 24) // (n * d)))
+    rng = np.random.default_rng(seed)
+    best_count, best_mask = -1, None
+    with np.errstate(all='ignore'):
+        for start in range(0, iterations, batch_size):
+            k = min(batch_size, iterations - start)
+            samples = rng.integers(0, n, size=(k, m))
+            ordered = np.sort(samples, axis=1)
+            distinct = np.all(ordered[:, 1:] != ordered[:, :-1], axis=1)
+            if not distinct.any():
+                continue
+            samples = samples[distinct]
+            try:
+                matrices = estimate(src[samples], dst[samples], model)
+            except np.linalg.LinAlgError:
+                continue
+            inliers = residuals(matrices, src, dst) < threshold
+            counts = inliers.sum(axis=1)
+            best = int(np.argmax(counts))
+            if counts[best] > best_count:
+                best_count, best_mask = counts[best], inliers[best]
+    if best_mask is None or best_count < m:
+        raise ValueError("RANSAC found no consensus set")
+    return estimate(src[best_mask], dst[best_mask], model), best_mask
+
+def similarity_parameters2D(matrix):
+    # (scale, angleDegrees, tx, ty) as taken by Controller.perform2D
+    matrix = np.asarray(matrix)
+    scale = np.hypot(matrix[0, 0], matrix[1, 0])
+    angle = np.degrees(np.arctan2(matrix[1, 0], matrix[0, 0]))
+    return scale, angle, matrix[0, 2], matrix[1, 2]
@@ -0,0 +1,169 @@
+from contextlib import contextmanager
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+class StageStats:
+    __slots__ = ('calls', 'seconds', 'points', 'bytes')
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.points = 0
+        self.bytes = 0
+
+    def as_dict(self):
+        return {'calls': self.calls, 'seconds': self.seconds, 'points': self.points, 'bytes': self.bytes}
+
+class Instrumentation:
+    """Per-stage timers and counters for the Controller hot paths.
+
+    A Controller only touches this when its instrumentation attribute is
+    set, so the uninstrumented path pays a single None check per call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def record(self, stage, seconds, points = 0, nbytes = 0):
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = StageStats()
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.points += points
+            stats.bytes += nbytes
+
+    def time(self, stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.record(stage, time.perf_counter() - start)
+        return result
+
+    def wrap(self, stage, factory):
+        # for factories that build a fresh array, which is counted as allocated
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = factory(*args, **kwargs)
+            self.record(stage, time.perf_counter() - start, nbytes=getattr(result, 'nbytes', 0))
+            return result
+        return timed
+
+    def stats(self):
+        with self._lock:
+            return {stage: stats.as_dict() for stage, stats in self._stages.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def to_prometheus(self, prefix = 'geometric_transformer'):
+        metrics = (('seconds', 'Time spent in the stage'),
+                   ('calls', 'Number of times the stage ran'),
+                   ('points', 'Points processed by the stage'),
+                   ('bytes', 'Bytes allocated by the stage'))
+        snapshot = self.stats()
+        lines = []
+        for field, help_text in metrics:
+            name = f"{prefix}_stage_{field}_total"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for stage, values in sorted(snapshot.items()):
+                lines.append(f'{name}{{stage="{stage}"}} {values[field]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path, prefix = 'geometric_transformer'):
+        # write then rename so scrapers never read a half-written file
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(self.to_prometheus(prefix))
+        os.replace(tmp, path)
+
+class PeriodicExporter:
+    """Exports an Instrumentation snapshot every interval seconds to a
+    Prometheus text file, a logger, or both."""
+
+    def __init__(self, instrumentation, interval = 10.0, path = None, logger = None):
+        self.instrumentation = instrumentation
+        self.interval = interval
+        self.path = path
+        self.logger = logger or (None if path else logging.getLogger(__name__))
+        self._stop = threading.Event()
+        self._thread = None
+
+    def export(self):
+        if self.path:
+            self.instrumentation.write_prometheus(self.path)
+        if self.logger:
+            self.logger.info("transform stage stats: %s", self.instrumentation.stats())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.export()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='stats-exporter', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self.export()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+class ProfileResult:
+    def __init__(self):
+        self.profile = None
+        self.memory = []
+        self.peak_bytes = 0
+
+    def report(self, limit = 20, sort = 'cumulative'):
+        out = io.StringIO()
+        if self.profile is not None:
+            self.profile.stream = out
+            self.profile.sort_stats(sort).print_stats(limit)
+        if self.memory:
+            out.write(f"Peak traced memory: {self.peak_bytes} bytes\n")
+            for stat in self.memory[:limit]:
+                out.write(f"{stat}\n")
+        return out.getvalue()
+
+@contextmanager
+def profile(trace_memory = True, frames = 1):
+    # cProfile (and optionally tracemalloc) capture for a block of calls
+    result = ProfileResult()
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(frames)
+    if trace_memory:
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        result.profile = pstats.Stats(profiler)
+        if trace_memory:
+            result.memory = tracemalloc.take_snapshot().compare_to(before, 'lineno')
+            result.peak_bytes = tracemalloc.get_traced_memory()[1]
+        if started_tracing:
+            tracemalloc.stop()
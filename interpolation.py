@@ -0,0 +1,147 @@
+from quaternions import Quaternion, QuaternionArray, _hamilton
+import numpy as np
+
+def _as_array(q):
+    if isinstance(q, QuaternionArray):
+        return q.q
+    if isinstance(q, Quaternion):
+        return q.q.reshape(1, 4)
+    if isinstance(q, (list, tuple)) and q and isinstance(q[0], Quaternion):
+        return np.stack([p.q for p in q])
+    return np.asarray(q, dtype=np.float64).reshape(-1, 4)
+
+def _normalize(q):
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+def _slerp(q0, q1, t, shortest = True):
+    t = np.asarray(t, dtype=np.float64)[..., None]
+    dot = np.sum(q0 * q1, axis=-1, keepdims=True)
+    if shortest:
+        q1 = np.where(dot < 0, -q1, q1)
+        dot = np.abs(dot)
+    theta = np.arccos(np.clip(dot, -1, 1))
+    sin = np.sin(theta)
+    # nearly parallel keys fall back to a normalized lerp
+    small = sin < 1e-6
+    safe = np.where(small, 1, sin)
+    w0 = np.where(small, 1 - t, np.sin((1 - t) * theta) / safe)
+    w1 = np.where(small, t, np.sin(t * theta) / safe)
+    return _normalize(w0 * q0 + w1 * q1)
+
+def _nlerp(q0, q1, t):
+    t = np.asarray(t, dtype=np.float64)[..., None]
+    q1 = np.where(np.sum(q0 * q1, axis=-1, keepdims=True) < 0, -q1, q1)
+    return _normalize((1 - t) * q0 + t * q1)
+
+def _log(q):
+    # log of unit quaternions as pure quaternions (w = 0)
+    v = q[..., :3]
+    n = np.linalg.norm(v, axis=-1, keepdims=True)
+    angle = np.arctan2(n, q[..., 3:])
+    scale = np.where(n > 1e-12, angle / np.where(n > 1e-12, n, 1), 1)
+    return np.concatenate([v * scale, np.zeros_like(n)], axis=-1)
+
+def _exp(q):
+    v = q[..., :3]
+    n = np.linalg.norm(v, axis=-1, keepdims=True)
+    scale = np.where(n > 1e-12, np.sin(n) / np.where(n > 1e-12, n, 1), 1)
+    return np.concatenate([v * scale, np.cos(n)], axis=-1)
+
+def _conjugate(q):
+    return q * np.array([-1, -1, -1, 1])
+
+def _hemisphere(keys):
+    # flip keys so consecutive ones lie in the same hemisphere
+    keys = keys.copy()
+    if len(keys) > 1:
+        signs = np.sign(np.sum(keys[1:] * keys[:-1], axis=1))
+        signs[signs == 0] = 1
+        keys[1:] *= np.cumprod(signs)[:, None]
+    return keys
+
+def squad_controls(keys):
+    keys = _hemisphere(_normalize(_as_array(keys)))
+    prev = np.concatenate([keys[:1], keys[:-1]])
+    nxt = np.concatenate([keys[1:], keys[-1:]])
+    inv = _conjugate(keys)
+    tangent = _log(_hamilton(inv, nxt)) + _log(_hamilton(inv, prev))
+    return _hamilton(keys, _exp(-tangent / 4))
+
+def slerp(q0, q1, t):
+    return QuaternionArray(_slerp(_as_array(q0), _as_array(q1), t).reshape(-1, 4))
+
+def nlerp(q0, q1, t):
+    return QuaternionArray(_nlerp(_as_array(q0), _as_array(q1), t).reshape(-1, 4))
+
+def squad(q0, q1, s0, s1, t):
+    q0, q1, s0, s1 = (_as_array(q) for q in (q0, q1, s0, s1))
+    t = np.asarray(t, dtype=np.float64)
+    outer = _slerp(q0, q1, t, shortest=False)
+    inner = _slerp(s0, s1, t, shortest=False)
+    return QuaternionArray(_slerp(outer, inner, 2 * t * (1 - t), shortest=False).reshape(-1, 4))
+
+def to_matrices(q, scale = 1, translation = (0, 0, 0)):
+    # F x 4 x 4 frames laid out like Controller.getMatrix3D
+    q = _as_array(q)
+    matrices = np.zeros((q.shape[0], 4, 4))
+    matrices[:, :3, :3] = np.asarray(scale, dtype=np.float64).reshape(-1, 1, 1) * QuaternionArray(q).rotation_matrices()
+    matrices[:, :3, 3] = np.asarray(translation, dtype=np.float64).reshape(-1, 3)
+    matrices[:, 3, 3] = 1
+    return matrices
+
+class Trajectory:
+    """Rotation trajectory through keyframe quaternions.
+
+    Times are expressed in keyframe units: t = 1.5 is halfway between the
+    second and third key.
+    """
+
+    METHODS = ('slerp', 'nlerp', 'squad')
+
+    def __init__(self, keyframes, method = 'slerp'):
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown interpolation method: {method}")
+        self.keys = _hemisphere(_normalize(_as_array(keyframes)))
+        if len(self.keys) < 2:
+            raise ValueError("A trajectory needs at least two keyframes")
+        self.method = method
+        self.controls = squad_controls(self.keys) if method == 'squad' else None
+
+    def times(self, frames):
+        if np.isscalar(frames):
+            return np.linspace(0, len(self.keys) - 1, int(frames))
+        return np.asarray(frames, dtype=np.float64).reshape(-1)
+
+    def _evaluate(self, t):
+        seg = np.clip(np.floor(t).astype(np.intp), 0, len(self.keys) - 2)
+        local = t - seg
+        q0, q1 = self.keys[seg], self.keys[seg + 1]
+        if self.method == 'slerp':
+            return _slerp(q0, q1, local)
+        if self.method == 'nlerp':
+            return _nlerp(q0, q1, local)
+        s0, s1 = self.controls[seg], self.controls[seg + 1]
+        outer = _slerp(q0, q1, local, shortest=False)
+        inner = _slerp(s0, s1, local, shortest=False)
+        return _slerp(outer, inner, 2 * local * (1 - local), shortest=False)
+
+    def quaternions(self, frames):
+        return QuaternionArray(self._evaluate(self.times(frames)))
+
+    def matrices(self, frames, scale = 1, translation = (0, 0, 0)):
+        return to_matrices(self._evaluate(self.times(frames)), scale, translation)
+
+    def iter_frames(self, frames, matrices = False, chunk_size = 4096, scale = 1, translation = (0, 0, 0)):
+        # evaluates chunk_size frames at a time and yields them one by one
+        if np.isscalar(frames):
+            count = int(frames)
+            step = (len(self.keys) - 1) / max(count - 1, 1)
+            chunks = (np.arange(start, min(start + chunk_size, count)) * step
+                      for start in range(0, count, chunk_size))
+        else:
+            t = self.times(frames)
+            chunks = (t[start:start + chunk_size] for start in range(0, len(t), chunk_size))
+        for chunk in chunks:
+            q = self._evaluate(chunk)
+            block = to_matrices(q, scale, translation) if matrices else q
+            yield from block
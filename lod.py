@@ -0,0 +1,61 @@
+import numpy as np
+
+def stratified_order(points, cells = None, seed = 0):
+    # permutation of an N x d point set in which every prefix is a
+    # voxel-stratified random sample: round r holds the r-th point of every
+    # occupied voxel, and voxels come in random order within a round
+    points = np.asarray(points, dtype=np.float64)
+    n, d = points.shape
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+    if cells is None:
+        # about four points per voxel for evenly spread data
+        cells = max(1, int(round((n / 4) ** (1 / d))))
+    finite = np.isfinite(points).all(axis=1)
+    low = points[finite].min(axis=0) if finite.any() else np.zeros(d)
+    high = points[finite].max(axis=0) if finite.any() else np.ones(d)
+    span = np.where(high > low, high - low, 1)
+    scaled = np.where(finite[:, None], (points - low) / span * cells, 0)
+    cell = np.clip(scaled.astype(np.int64), 0, cells - 1)
+    voxel = np.ravel_multi_index(tuple(cell.T), (cells,) * d)
+    # non-finite points go after every finite one
+    voxel = np.where(finite, voxel, -1)
+    shuffle = np.random.default_rng(seed).permutation(n)
+    shuffled = voxel[shuffle]
+    by_voxel = np.argsort(shuffled, kind='stable')
+    grouped = shuffled[by_voxel]
+    starts = np.r_[0, np.flatnonzero(grouped[1:] != grouped[:-1]) + 1]
+    rank = np.empty(n, dtype=np.int64)
+    rank[by_voxel] = np.arange(n) - np.repeat(starts, np.diff(np.r_[starts, n]))
+    rank[~finite[shuffle]] = n
+    return shuffle[np.argsort(rank, kind='stable')]
+
+class LevelOfDetail:
+    """Progressive decimation of an N x d point set for plotting.
+
+    The stratified ordering is computed once; sample() then returns the
+    first `budget` points of it, optionally restricted to a viewport, so
+    zooming in refines the sample without rebuilding anything.
+    """
+
+    def __init__(self, points, cells = None, seed = 0):
+        self.points = np.asarray(points)
+        self.order = stratified_order(self.points, cells, seed)
+
+    def __len__(self):
+        return self.points.shape[0]
+
+    def sample(self, budget, viewport = None, extra = None):
+        # sorted indices of at most budget points; with a (low, high)
+        # viewport only points inside it count, and a point also counts
+        # when its row in extra (e.g. its transformed position) is inside
+        budget = max(int(budget), 0)
+        if viewport is None:
+            return np.sort(self.order[:budget])
+        low, high = (np.asarray(bound, dtype=np.float64) for bound in viewport)
+        d = low.shape[0]
+        inside = np.all((self.points[:, :d] >= low) & (self.points[:, :d] <= high), axis=1)
+        if extra is not None:
+            extra = np.asarray(extra)
+            inside |= np.all((extra[:, :d] >= low) & (extra[:, :d] <= high), axis=1)
+        return np.sort(self.order[inside[self.order]][:budget])
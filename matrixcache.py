@@ -0,0 +1,62 @@
+from collections import OrderedDict
+import threading
+import numpy as np
+
+class MatrixCache:
+    """Bounded, thread-safe LRU cache for matrix factories.
+
+    Cached matrices are marked read-only because the same array is handed
+    to every caller that asks for the same key.
+    """
+
+    def __init__(self, maxsize = 128):
+        self.maxsize = max(int(maxsize), 0)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, factory):
+        with self._lock:
+            matrix = self._entries.get(key)
+            if matrix is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return matrix
+            self.misses += 1
+        matrix = np.asarray(factory())
+        matrix.setflags(write=False)
+        if self.maxsize == 0:
+            return matrix
+        with self._lock:
+            self._entries[key] = matrix
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return matrix
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = max(int(maxsize), 0)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,158 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import mmap
+import os
+import tempfile
+import numpy as np
+
+def _transform_rows(rows, matrix, out, decimals):
+    np.matmul(rows, matrix.T, out=out)
+    if decimals is not None:
+        np.round(out, decimals, out=out)
+
+def _mapped_file(array):
+    # (filename, byte offset) of a C-contiguous array that lies in a shared
+    # file-backed np.memmap, or None; workers can map the same pages, but
+    # not the private pages of a copy-on-write ('c') map
+    if not array.flags.c_contiguous:
+        return None
+    base = array
+    while isinstance(base, np.ndarray):
+        if isinstance(base, np.memmap) and isinstance(base.base, mmap.mmap) and base.filename and base.mode != 'c':
+            return base.filename, base.offset + array.ctypes.data - base.ctypes.data
+        base = base.base
+    return None
+
+def _process_shard(source, target, shape, in_dtype, out_dtype, matrix, start, stop, decimals):
+    # runs in a worker process; both buffers are mapped from their files,
+    # never pickled, and only this shard's rows are touched
+    width = shape[1]
+    rows = np.memmap(source[0], dtype=in_dtype, mode='r', shape=(stop - start, width),
+                     offset=source[1] + start * width * np.dtype(in_dtype).itemsize)
+    out = np.memmap(target[0], dtype=out_dtype, mode='r+', shape=(stop - start, width),
+                    offset=target[1] + start * width * np.dtype(out_dtype).itemsize)
+    _transform_rows(rows, matrix, out, decimals)
+
+class ShardedExecutor:
+    """Runs a homogeneous transform over shards of a packed point array.
+
+    The 'thread' backend shares the arrays directly, since NumPy releases the
+    GIL inside matmul. The 'process' backend has every worker map the input
+    and output from their files and handle one shard. Arrays that already
+    live in a file-backed np.memmap (np.load(..., mmap_mode=...), or
+    buffers from shared_empty()) are attached in place. Any other input is
+    first copied into a temporary mapping, and any other output is copied
+    back from one. Each copy costs one pass over the data and its size in
+    extra memory, which is often more than the matmul itself. Small inputs
+    or workers=1 use the single-threaded path.
+    """
+
+    BACKENDS = ('thread', 'process')
+
+    def __init__(self, workers = None, shard_size = 1 << 20, backend = 'thread'):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_size = max(int(shard_size), 1)
+        self.backend = backend
+        self._pool = None
+        self._files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        # buffers from shared_empty() stay valid, only their files go away
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        for path in self._files:
+            _unlink(path)
+        self._files = []
+
+    def shared_empty(self, shape, dtype = np.float64):
+        # an array process workers attach to without copying, e.g. a
+        # result buffer reused as out across transform() calls; backed by
+        # a file in /dev/shm where there is one, removed by close()
+        path = self._temporary_file()
+        self._files.append(path)
+        return np.memmap(path, dtype=dtype, mode='w+', shape=shape)
+
+    def _temporary_file(self):
+        directory = '/dev/shm' if os.path.isdir('/dev/shm') else None
+        fd, path = tempfile.mkstemp(prefix='sharded-', suffix='.bin', dir=directory)
+        os.close(fd)
+        return path
+
+    def _get_pool(self):
+        if self._pool is None:
+            pool_type = ThreadPoolExecutor if self.backend == 'thread' else ProcessPoolExecutor
+            self._pool = pool_type(max_workers=self.workers)
+        return self._pool
+
+    def _shards(self, n):
+        return [(start, min(start + self.shard_size, n)) for start in range(0, n, self.shard_size)]
+
+    def transform(self, matrix, points, out = None, decimals = 3):
+        # points are (d + 1) x N columns as returned by pack2D/pack3D; the
+        # result has the same layout and is backed by an N x (d + 1) buffer
+        matrix = np.asarray(matrix)
+        rows = points.T
+        dtype = np.result_type(matrix, points)
+        out_rows = None if out is None else out.T
+        shards = self._shards(rows.shape[0])
+        if self.workers == 1 or len(shards) <= 1 or self.backend == 'thread':
+            if out_rows is None:
+                out_rows = np.empty(rows.shape, dtype=dtype)
+            if self.workers == 1 or len(shards) <= 1:
+                _transform_rows(rows, matrix, out_rows, decimals)
+            else:
+                pool = self._get_pool()
+                futures = [pool.submit(_transform_rows, rows[a:b], matrix, out_rows[a:b], decimals) for a, b in shards]
+                for future in futures:
+                    future.result()
+        else:
+            out_rows = self._transform_processes(matrix, rows, out_rows, dtype, shards, decimals)
+        return out_rows.T
+
+    def _transform_processes(self, matrix, rows, out_rows, dtype, shards, decimals):
+        # without an out buffer the workers write into a fresh mapping that
+        # is returned as the result; its file is removed once they are done
+        temporary = []
+        try:
+            source = _mapped_file(rows)
+            if source is None:
+                temporary.append(self._temporary_file())
+                staged = np.memmap(temporary[-1], dtype=rows.dtype, mode='w+', shape=rows.shape)
+                staged[:] = rows
+                source = (temporary[-1], 0)
+            staged_out = None
+            if out_rows is None:
+                temporary.append(self._temporary_file())
+                out_rows = np.memmap(temporary[-1], dtype=dtype, mode='w+', shape=rows.shape)
+                target = (temporary[-1], 0)
+            else:
+                target = _mapped_file(out_rows) if out_rows.flags.writeable else None
+            if target is None:
+                temporary.append(self._temporary_file())
+                staged_out = np.memmap(temporary[-1], dtype=out_rows.dtype, mode='w+', shape=out_rows.shape)
+                target = (temporary[-1], 0)
+            pool = self._get_pool()
+            futures = [pool.submit(_process_shard, source, target, rows.shape, rows.dtype,
+                                   out_rows.dtype, matrix, a, b, decimals) for a, b in shards]
+            for future in futures:
+                future.result()
+            if staged_out is not None:
+                out_rows[:] = staged_out
+        finally:
+            for path in temporary:
+                _unlink(path)
+        return out_rows
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
@@ -0,0 +1,100 @@
+from functools import lru_cache
+from quaternions import Quaternion
+import numpy as np
+
+class TransformPipeline:
+    """Chain of homogeneous transform steps folded into a single matrix.
+
+    Steps are applied in the order they are appended. The compiled matrix is
+    memoized on the step parameters, so re-applying an unchanged pipeline
+    costs one matmul over the points.
+    """
+
+    def __init__(self, dim = 2):
+        if dim not in (2, 3):
+            raise ValueError("TransformPipeline only supports 2D or 3D transforms")
+        self.dim = dim
+        self.steps = []
+
+    def __len__(self):
+        return len(self.steps)
+
+    def _vector(self, values, name):
+        values = tuple(float(v) for v in np.ravel(values))
+        if len(values) != self.dim:
+            raise ValueError(f"{name} needs {self.dim} components, got {len(values)}")
+        return values
+
+    def scale(self, s, pivot = None):
+        factors = (float(s),) * self.dim if np.isscalar(s) else self._vector(s, "scale")
+        self._pivoted(('scale', factors), pivot)
+        return self
+
+    def rotate(self, angleDegrees, axis = None, pivot = None):
+        if self.dim == 3:
+            if axis is None:
+                raise ValueError("3D rotations need an axis")
+            axis = self._vector(axis, "axis")
+        self._pivoted(('rotate', float(angleDegrees), axis), pivot)
+        return self
+
+    def translate(self, *offset):
+        self.steps.append(('translate', self._vector(offset, "translation")))
+        return self
+
+    def matrix(self, matrix):
+        matrix = np.asarray(matrix, dtype=np.float64)
+        if matrix.shape != (self.dim + 1, self.dim + 1):
+            raise ValueError(f"Expected a {self.dim + 1}x{self.dim + 1} matrix, got {matrix.shape}")
+        self.steps.append(('matrix', tuple(map(tuple, matrix))))
+        return self
+
+    def _pivoted(self, step, pivot):
+        if pivot is None:
+            self.steps.append(step)
+            return
+        pivot = self._vector(pivot, "pivot")
+        self.steps.append(('translate', tuple(-p for p in pivot)))
+        self.steps.append(step)
+        self.steps.append(('translate', pivot))
+
+    def clear(self):
+        self.steps.clear()
+        return self
+
+    def compile(self):
+        return _compile(self.dim, tuple(self.steps))
+
+    def apply(self, points):
+        # points are (dim + 1) x N homogeneous columns, as returned by pack2D/pack3D
+        return np.matmul(self.compile(), points)
+
+    def perform(self, controller):
+        points = controller.pack3D() if self.dim == 3 else controller.pack2D()
+        return np.round(self.apply(points), 3)
+
+def _step_matrix(dim, step):
+    kind = step[0]
+    m = np.identity(dim + 1)
+    if kind == 'scale':
+        m[np.arange(dim), np.arange(dim)] = step[1]
+    elif kind == 'translate':
+        m[:dim, -1] = step[1]
+    elif kind == 'rotate':
+        angle = np.radians(step[1])
+        if dim == 2:
+            m[:2, :2] = [[np.cos(angle), -np.sin(angle)],
+                         [np.sin(angle),  np.cos(angle)]]
+        else:
+            m[:3, :3] = Quaternion(*step[2], angle).r
+    elif kind == 'matrix':
+        m = np.array(step[1])
+    return m
+
+@lru_cache(maxsize=256)
+def _compile(dim, steps):
+    compiled = np.identity(dim + 1)
+    for step in steps:
+        compiled = np.matmul(_step_matrix(dim, step), compiled)
+    compiled.setflags(write=False)
+    return compiled
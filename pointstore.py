@@ -0,0 +1,122 @@
+from coordinates import Coordinate, P2, P3, unique_points
+from precision import get_dtype
+import numpy as np
+
+class PointStore:
+    """Contiguous, growable store of homogeneous points (one row per point).
+
+    Rows are kept in an N x (dim + 1) array that grows by doubling, so bulk
+    appends are amortized O(1) per point. P2/P3 objects are only built when
+    a single point is requested.
+    """
+
+    def __init__(self, dim, capacity=16, dtype=None):
+        if dim not in (2, 3):
+            raise ValueError("PointStore only supports 2D or 3D points")
+        self.dim = dim
+        self.width = dim + 1
+        self._data = np.empty((max(int(capacity), 1), self.width), dtype=dtype or get_dtype())
+        self._size = 0
+        # bumped on every change so caches built from the points can tell
+        # when they are stale; resets only when existing rows change, so a
+        # cache can tell appends (extend it) from removals (rebuild it)
+        self.version = 0
+        self.resets = 0
+
+    @property
+    def capacity(self):
+        return self._data.shape[0]
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    @property
+    def array(self):
+        return self._data[:self._size]
+
+    def __len__(self):
+        return self._size
+
+    def reserve(self, n):
+        if n <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < n:
+            capacity *= 2
+        grown = np.empty((capacity, self.width), dtype=self._data.dtype)
+        grown[:self._size] = self._data[:self._size]
+        self._data = grown
+
+    def append(self, point):
+        if isinstance(point, Coordinate):
+            point = point.to_homogeneous()
+        self.add_points(np.asarray(point).reshape(1, -1))
+
+    def add_points(self, points):
+        points = np.asarray(points)
+        if points.ndim == 1:
+            points = points.reshape(1, -1)
+        if points.ndim != 2 or points.shape[1] not in (self.dim, self.width):
+            raise ValueError(f"Expected an N x {self.dim} or N x {self.width} array, got shape {points.shape}")
+        n = points.shape[0]
+        self.reserve(self._size + n)
+        block = self._data[self._size:self._size + n]
+        block[:, :points.shape[1]] = points
+        if points.shape[1] == self.dim:
+            block[:, -1] = 1
+        self._size += n
+        self.version += 1
+
+    def remove(self, index):
+        keep = np.ones(self._size, dtype=bool)
+        keep[index] = False
+        kept = self.array[keep]
+        self._data[:kept.shape[0]] = kept
+        self._size = kept.shape[0]
+        self.version += 1
+        self.resets += 1
+
+    def deduplicate(self, tol = 1e-9):
+        # keeps the first of every set of points equal within tol after the
+        # homogeneous divide; returns how many were dropped
+        _, index = unique_points(self.array, tol, homogeneous=True, return_index=True)
+        dropped = self._size - index.shape[0]
+        if dropped:
+            self._data[:index.shape[0]] = self.array[index]
+            self._size = index.shape[0]
+            self.version += 1
+            self.resets += 1
+        return dropped
+
+    def clear(self):
+        self._size = 0
+        self.version += 1
+        self.resets += 1
+
+    def modified(self):
+        # existing rows were written in place, e.g. through a point view
+        self.version += 1
+        self.resets += 1
+
+    def packed(self):
+        # (dim + 1) x N view over the live rows; no copy is made
+        return self.array.T
+
+    def point(self, i):
+        # a view onto row i, not a copy; it follows the store as it grows,
+        # but removing earlier points shifts which point the row holds
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError(f"Point index {i} out of range for {self._size} points")
+        return (P2 if self.dim == 2 else P3).view(self, int(i))
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return self.point(index)
+        return self.array[index]
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self.point(i)
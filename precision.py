@@ -0,0 +1,25 @@
+from contextlib import contextmanager
+import numpy as np
+
+SUPPORTED_DTYPES = (np.dtype(np.float32), np.dtype(np.float64))
+
+_dtype = np.dtype(np.float64)
+
+def get_dtype():
+    return _dtype
+
+def set_dtype(dtype):
+    global _dtype
+    dtype = np.dtype(dtype)
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported precision {dtype}; use float32 or float64")
+    _dtype = dtype
+
+@contextmanager
+def precision(dtype):
+    previous = get_dtype()
+    set_dtype(dtype)
+    try:
+        yield get_dtype()
+    finally:
+        set_dtype(previous)
@@ -1,51 +1,178 @@
+from precision import get_dtype
 import numpy as np
 
+def _hamilton(a, b):
+    v1, w1 = a[..., :3], a[..., 3:]
+    v2, w2 = b[..., :3], b[..., 3:]
+    v = np.cross(v1, v2) + w1 * v2 + w2 * v1
+    w = w1 * w2 - np.sum(v1 * v2, axis=-1, keepdims=True)
+    return np.concatenate([v, w], axis=-1)
+
+class QuaternionArray:
+    """N quaternions stored as rows of an N x 4 array laid out (x, y, z, w)."""
+
+    def __init__(self, q):
+        self.q = np.asarray(q, dtype=get_dtype()).reshape(-1, 4)
+
+    @classmethod
+    def from_axis_angle(cls, axes, angles):
+        axes = np.asarray(axes, dtype=get_dtype()).reshape(-1, 3)
+        angles = np.asarray(angles, dtype=get_dtype()).reshape(-1, 1)
+        axes, angles = np.broadcast_arrays(axes, angles)
+        half = angles[:, :1] / 2
+        q = np.empty((axes.shape[0], 4), dtype=get_dtype())
+        q[:, :3] = axes / np.linalg.norm(axes, axis=1, keepdims=True) * np.sin(half)
+        q[:, 3:] = np.cos(half)
+        return cls(q)
+
+    @classmethod
+    def identity(cls, n):
+        q = np.zeros((n, 4), dtype=get_dtype())
+        q[:, 3] = 1
+        return cls(q)
+
+    def __len__(self):
+        return self.q.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return Quaternion(_row=self.q[index])
+        return QuaternionArray(self.q[index])
+
+    def __repr__(self):
+        return f"QuaternionArray({self.q!r})"
+
+    @property
+    def x(self):
+        return self.q[:, 0]
+
+    @property
+    def y(self):
+        return self.q[:, 1]
+
+    @property
+    def z(self):
+        return self.q[:, 2]
+
+    @property
+    def w(self):
+        return self.q[:, 3]
+
+    @property
+    def v(self):
+        return self.q[:, :3]
+
+    def norm(self):
+        return np.linalg.norm(self.q, axis=1)
+
+    def normalized(self):
+        return QuaternionArray(self.q / self.norm()[:, None])
+
+    def canonical(self):
+        # q and -q are the same rotation; keep the one with w >= 0
+        return QuaternionArray(np.where(self.q[:, 3:] < 0, -self.q, self.q))
+
+    def conjugate(self):
+        q = self.q.copy()
+        q[:, :3] *= -1
+        return QuaternionArray(q)
+
+    def inverse(self):
+        conj = self.conjugate()
+        conj.q /= np.sum(self.q ** 2, axis=1, keepdims=True)
+        return conj
+
+    def __mul__(self, other):
+        if isinstance(other, Quaternion):
+            other = QuaternionArray(other.q)
+        if isinstance(other, QuaternionArray):
+            return QuaternionArray(_hamilton(self.q, other.q))
+        return NotImplemented
+
+    def __truediv__(self, other):
+        if isinstance(other, Quaternion):
+            other = QuaternionArray(other.q)
+        if isinstance(other, QuaternionArray):
+            return self * other.inverse()
+        return NotImplemented
+
+    def rotation_matrices(self):
+        x, y, z, w = self.q.T
+        r = np.empty((self.q.shape[0], 3, 3), dtype=self.q.dtype)
+        r[:, 0, 0] = 1 - 2 * (y ** 2 + z ** 2)
+        r[:, 0, 1] = 2 * (x * y - z * w)
+        r[:, 0, 2] = 2 * (x * z + y * w)
+        r[:, 1, 0] = 2 * (x * y + z * w)
+        r[:, 1, 1] = 1 - 2 * (x ** 2 + z ** 2)
+        r[:, 1, 2] = 2 * (z * y - x * w)
+        r[:, 2, 0] = 2 * (x * z - y * w)
+        r[:, 2, 1] = 2 * (z * y + x * w)
+        r[:, 2, 2] = 1 - 2 * (x ** 2 + y ** 2)
+        return r
+
+    def rotate(self, points, pairwise = False):
+        # M x 3 points -> N x M x 3, or N x 3 when pairing quaternion i with point i
+        points = np.asarray(points).reshape(-1, 3)
+        r = self.rotation_matrices()
+        if pairwise:
+            return np.einsum('nij,nj->ni', r, points)
+        return np.einsum('nij,mj->nmi', r, points)
+
 class Quaternion:
-    def __init__(self, x = None, y = None, z = None, angle = None, qx = None, qy = None, qz = None, qw = None):
-        if x is not None :
+    def __init__(self, x = None, y = None, z = None, angle = None, qx = None, qy = None, qz = None, qw = None, _row = None):
+        self._r = None
+        if _row is not None:
+            self.q = _row
+        elif x is not None :
             self.to_quaternion(x, y, z, angle)
         else :
-            if qw < 0:
-                qx *= -1
-                qy *= -1
-                qz *= -1
-                qw *= -1
-            self.x = qx
-            self.y = qy
-            self.z = qx
-            self.w = qw
-            self.v = np.array([self.x, self.y, self.z], dtype=np.float32)
-        self.rotation_matrix()
+            self.q = QuaternionArray([qx, qy, qz, qw]).canonical().q[0]
 
     def to_quaternion(self, x, y, z, angle):
-        vec = np.array([x, y, z], dtype=np.float32)
-        nor = np.linalg.norm(vec)
-        self.v = vec / nor * np.sin(angle / 2)
-        self.x, self.y, self.z = self.v
-        self.w = np.round(np.cos(angle / 2), 2)
+        self.q = QuaternionArray.from_axis_angle((x, y, z), angle).q[0]
+        self._r = None
+
+    @property
+    def x(self):
+        return self.q[0]
+
+    @property
+    def y(self):
+        return self.q[1]
+
+    @property
+    def z(self):
+        return self.q[2]
+
+    @property
+    def w(self):
+        return self.q[3]
+
+    @property
+    def v(self):
+        return self.q[:3]
+
+    @property
+    def r(self):
+        if self._r is None:
+            self.rotation_matrix()
+        return self._r
 
     def __repr__(self):
         return f"({self.x}, {self.y}, {self.z}, {self.w})"
-    
+
     def rotation_matrix(self):
-        self.r = np.array([
-            [1 - 2*(self.y ** 2 + self.z ** 2),       2 * (self.x * self.y - self.z * self.w), 2 * (self.x * self.z + self.y * self.w)],
-            [2 * (self.x * self.y + self.z * self.w), 1 - 2*(self.x ** 2 + self.z ** 2),       2 * (self.z * self.y - self.x * self.w)],
-            [2 * (self.x * self.z - self.y * self.w), 2 * (self.z * self.y + self.x * self.w), 1 - 2*(self.x ** 2 + self.y ** 2)      ]
-                         ])
-        
+        self._r = QuaternionArray(self.q).rotation_matrices()[0]
+        return self._r
+
     def __mul__(self, other):
         if isinstance(other, np.ndarray):
             return np.matmul(self.r, other)
         elif isinstance(other, Quaternion):
-            newV = np.cross(self.v, other.v) + self.w * other.v + other.w * self.v
-            newW = np.array([self.w * other.w - np.dot(self.v, other.v)])
-            x, y, z, w = np.concat([newV, newW])
+            x, y, z, w = _hamilton(self.q, other.q)
             return Quaternion(qx=x, qy=y, qz=z, qw=w)
-        
+
     def __truediv__(self, other):
         if isinstance(other, Quaternion):
-            newV = np.cross(self.v, other.v) + self.w * other.v - other.w * self.v
-            newW = np.array([-self.w * other.w - np.dot(self.v, other.v)])
-            x, y, z, w = np.concat([newV, newW])
+            x, y, z, w = (QuaternionArray(self.q) / QuaternionArray(other.q)).q[0]
             return Quaternion(qx=x, qy=y, qz=z, qw=w)
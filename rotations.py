@@ -0,0 +1,131 @@
+from quaternions import QuaternionArray
+import numpy as np
+
+# below this angle the trig ratios switch to their Taylor series, which
+# avoids the catastrophic cancellation of e.g. (theta - sin(theta)) / theta^3
+SMALL_ANGLE = 1e-2
+
+def _vectors(v, width):
+    return np.asarray(v, dtype=np.float64).reshape(-1, width)
+
+def _matrices(m, size):
+    return np.asarray(m, dtype=np.float64).reshape(-1, size, size)
+
+def hat(omega):
+    omega = _vectors(omega, 3)
+    x, y, z = omega.T
+    k = np.zeros((omega.shape[0], 3, 3))
+    k[:, 0, 1], k[:, 0, 2] = -z, y
+    k[:, 1, 0], k[:, 1, 2] = z, -x
+    k[:, 2, 0], k[:, 2, 1] = -y, x
+    return k
+
+def vee(k):
+    k = _matrices(k, 3)
+    return np.stack([k[:, 2, 1] - k[:, 1, 2], k[:, 0, 2] - k[:, 2, 0], k[:, 1, 0] - k[:, 0, 1]], axis=1) / 2
+
+def _coefficients(theta):
+    # A = sin(t)/t, B = (1 - cos(t))/t^2, C = (t - sin(t))/t^3
+    t2 = theta ** 2
+    small = theta < SMALL_ANGLE
+    safe = np.where(small, 1, theta)
+    a = np.where(small, 1 - t2 / 6 + t2 ** 2 / 120, np.sin(safe) / safe)
+    b = np.where(small, 0.5 - t2 / 24 + t2 ** 2 / 720, (1 - np.cos(safe)) / safe ** 2)
+    c = np.where(small, 1 / 6 - t2 / 120 + t2 ** 2 / 5040, (safe - np.sin(safe)) / safe ** 3)
+    return a, b, c
+
+def so3_exp(omega):
+    # rotation vectors (N x 3) -> N x 3 x 3 rotation matrices
+    omega = _vectors(omega, 3)
+    theta = np.linalg.norm(omega, axis=1)
+    a, b, _ = _coefficients(theta)
+    k = hat(omega)
+    return np.identity(3) + a[:, None, None] * k + b[:, None, None] * np.matmul(k, k)
+
+def rodrigues(axes, angles):
+    axes = _vectors(axes, 3)
+    angles = np.asarray(angles, dtype=np.float64).reshape(-1, 1)
+    return so3_exp(axes / np.linalg.norm(axes, axis=1, keepdims=True) * angles)
+
+def quaternions_from_matrices(r):
+    # Shepperd's method: branch on the largest of w, x, y, z for stability
+    r = _matrices(r, 3)
+    trace = np.trace(r, axis1=1, axis2=2)
+    diag = np.diagonal(r, axis1=1, axis2=2)
+    candidates = np.concatenate([diag, trace[:, None]], axis=1)
+    choice = np.argmax(candidates, axis=1)
+    q = np.empty((r.shape[0], 4))
+    for i in range(4):
+        rows = choice == i
+        if not rows.any():
+            continue
+        m = r[rows]
+        if i == 3:
+            s = np.sqrt(1 + trace[rows]) * 2
+            q[rows] = np.stack([m[:, 2, 1] - m[:, 1, 2], m[:, 0, 2] - m[:, 2, 0],
+                                m[:, 1, 0] - m[:, 0, 1], s ** 2 / 4], axis=1) / s[:, None]
+            continue
+        j, k = (i + 1) % 3, (i + 2) % 3
+        s = np.sqrt(1 + m[:, i, i] - m[:, j, j] - m[:, k, k]) * 2
+        block = np.empty((m.shape[0], 4))
+        block[:, i] = s / 4
+        block[:, j] = (m[:, j, i] + m[:, i, j]) / s
+        block[:, k] = (m[:, k, i] + m[:, i, k]) / s
+        block[:, 3] = (m[:, k, j] - m[:, j, k]) / s
+        q[rows] = block
+    return QuaternionArray(q).canonical()
+
+def matrices_from_quaternions(q):
+    if not isinstance(q, QuaternionArray):
+        q = QuaternionArray(q)
+    return q.rotation_matrices()
+
+def so3_log(r):
+    # N x 3 x 3 rotations -> rotation vectors, going through quaternions so
+    # angles near 0 and near pi stay well conditioned
+    q = quaternions_from_matrices(r).q
+    v = q[:, :3]
+    s = np.linalg.norm(v, axis=1)
+    w = q[:, 3]
+    theta = 2 * np.arctan2(s, w)
+    # arctan2 has no cancellation, so theta / s is accurate down to the
+    # smallest s; only s == 0 needs its limit 2 / w
+    zero = s == 0
+    factor = np.where(zero, 2 / w, theta / np.where(zero, 1, s))
+    return v * factor[:, None]
+
+def axis_angle(r):
+    omega = so3_log(r)
+    angles = np.linalg.norm(omega, axis=1)
+    axes = np.where(angles[:, None] > 0, omega / np.where(angles > 0, angles, 1)[:, None], [0, 0, 1])
+    return axes, angles
+
+def se3_exp(twists):
+    # twists (N x 6, translational part first) -> N x 4 x 4 rigid motions
+    twists = _vectors(twists, 6)
+    rho, omega = twists[:, :3], twists[:, 3:]
+    theta = np.linalg.norm(omega, axis=1)
+    a, b, c = _coefficients(theta)
+    k = hat(omega)
+    k2 = np.matmul(k, k)
+    t = np.zeros((twists.shape[0], 4, 4))
+    t[:, :3, :3] = np.identity(3) + a[:, None, None] * k + b[:, None, None] * k2
+    v = np.identity(3) + b[:, None, None] * k + c[:, None, None] * k2
+    t[:, :3, 3] = np.einsum('nij,nj->ni', v, rho)
+    t[:, 3, 3] = 1
+    return t
+
+def se3_log(t):
+    t = _matrices(t, 4)
+    omega = so3_log(t[:, :3, :3])
+    theta = np.linalg.norm(omega, axis=1)
+    a, b, _ = _coefficients(theta)
+    small = theta < SMALL_ANGLE
+    safe = np.where(small, 1, theta)
+    # D = (1 - A / (2B)) / theta^2, the hat^2 coefficient of V^-1
+    d = np.where(small, 1 / 12 + theta ** 2 / 720 + theta ** 4 / 30240,
+                 (1 - a / (2 * np.where(small, 1, b))) / safe ** 2)
+    k = hat(omega)
+    v_inv = np.identity(3) - k / 2 + d[:, None, None] * np.matmul(k, k)
+    rho = np.einsum('nij,nj->ni', v_inv, t[:, :3, 3])
+    return np.concatenate([rho, omega], axis=1)
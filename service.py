@@ -0,0 +1,356 @@
+"""Local asyncio transform service with request micro-batching.
+
+    python service.py --port 8765 --window-ms 2 --max-batch 256
+    python service.py --unix /tmp/transform.sock
+
+    POST /transform2d  {"points": [[x, y], ...], "scale": 1, "angle": 0, "tx": 0, "ty": 0}
+    POST /transform3d  {"points": [[x, y, z], ...], "axis": [0, 0, 1], "scale": 1, "angle": 0,
+                        "tx": 0, "ty": 0, "tz": 0}
+    GET  /metrics      Prometheus text; /metrics.json for the same as JSON
+
+Requests arriving within the batch window are transformed together: their
+matrices are built as one stack, and each request's points are multiplied by
+their own matrix into one shared output that is split back per request.
+"""
+import argparse
+import asyncio
+from collections import deque
+import json
+import sys
+import time
+import numpy as np
+
+from controller import Controller
+from instrumentation import Instrumentation
+
+PARAMETERS = {
+    2: ('scale', 'angle', 'tx', 'ty'),
+    3: ('scale', 'angle', 'tx', 'ty', 'tz'),
+}
+
+class Overloaded(Exception):
+    pass
+
+class TooLarge(Exception):
+    pass
+
+class ServiceMetrics:
+    # stage counters live in an Instrumentation; request latencies are kept
+    # for the last `window` requests to report quantiles
+    QUANTILES = (0.5, 0.9, 0.99)
+
+    def __init__(self, window = 10000):
+        self.instrumentation = Instrumentation()
+        self.latencies = deque(maxlen=window)
+        self.started = time.monotonic()
+        self.requests = 0
+        self.points = 0
+        self.rejected = 0
+        self.batches = 0
+
+    def request_done(self, seconds, points):
+        self.requests += 1
+        self.points += points
+        self.latencies.append(seconds)
+
+    def snapshot(self):
+        uptime = time.monotonic() - self.started
+        latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+        return {
+            'uptime_seconds': uptime,
+            'requests': self.requests,
+            'rejected': self.rejected,
+            'batches': self.batches,
+            'points': self.points,
+            'mean_batch_requests': self.requests / self.batches if self.batches else 0.0,
+            'requests_per_sec': self.requests / uptime if uptime > 0 else 0.0,
+            'points_per_sec': self.points / uptime if uptime > 0 else 0.0,
+            'latency_seconds': {str(q): float(np.quantile(latencies, q)) for q in self.QUANTILES},
+            'stages': self.instrumentation.stats(),
+        }
+
+    def to_prometheus(self, prefix = 'geometric_transformer'):
+        snapshot = self.snapshot()
+        lines = []
+        for field in ('requests', 'rejected', 'batches', 'points'):
+            name = f"{prefix}_service_{field}_total"
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {snapshot[field]}")
+        name = f"{prefix}_service_latency_seconds"
+        lines.append(f"# TYPE {name} summary")
+        for q, value in snapshot['latency_seconds'].items():
+            lines.append(f'{name}{{quantile="{q}"}} {value}')
+        lines.append(f"{name}_count {len(self.latencies)}")
+        return "\n".join(lines) + "\n" + self.instrumentation.to_prometheus(prefix)
+
+class MicroBatcher:
+    """Coalesces concurrent transform requests of one dimension.
+
+    The first request of a batch opens a window of `window` seconds (or
+    until `max_batch` requests are queued); everything queued by then is
+    transformed together off the event loop. Once `max_pending` requests
+    or `max_points` points are waiting, submit raises Overloaded; a single
+    request of more than `max_points` points raises TooLarge, since it
+    could never be accepted.
+    """
+
+    def __init__(self, dim, controller = None, metrics = None, window = 0.002, max_batch = 256,
+                 max_pending = 1024, max_points = 1 << 22, decimals = 3):
+        self.dim = dim
+        self.controller = controller or Controller()
+        self.metrics = metrics or ServiceMetrics()
+        self.window = window
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.max_points = max_points
+        self.decimals = decimals
+        self._queue = deque()
+        self._pending_points = 0
+        self._wakeup = None
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._queue:
+            future = self._queue.popleft()[2]
+            if not future.done():
+                future.cancel()
+
+    async def submit(self, params, points):
+        # params holds one value per PARAMETERS entry (plus 'axis' in 3D);
+        # points is an N x dim array
+        n = points.shape[0]
+        if n > self.max_points:
+            raise TooLarge(f"{n} points in one request, at most {self.max_points} accepted")
+        if len(self._queue) >= self.max_pending or self._pending_points + n > self.max_points:
+            self.metrics.rejected += 1
+            raise Overloaded(f"{len(self._queue)} requests / {self._pending_points} points pending")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((params, points, future))
+        self._pending_points += n
+        self._wakeup.set()
+        return await future
+
+    async def _collect(self):
+        await self._wakeup.wait()
+        deadline = time.monotonic() + self.window
+        while len(self._queue) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        batch = [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+        if not self._queue:
+            self._wakeup.clear()
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            self._pending_points -= sum(item[1].shape[0] for item in batch)
+            batch = [item for item in batch if not item[2].cancelled()]
+            if not batch:
+                continue
+            try:
+                results = await loop.run_in_executor(None, self.transform_batch, batch)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.metrics.batches += 1
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def matrices(self, batch):
+        columns = {name: [item[0][name] for item in batch] for name in PARAMETERS[self.dim]}
+        if self.dim == 2:
+            return self.controller.getMatrix2D_batch(columns['scale'], columns['angle'], columns['tx'], columns['ty'])
+        axes = np.array([item[0]['axis'] for item in batch], dtype=np.float64)
+        return self.controller.getMatrix3D_batch(columns['scale'], axes, columns['angle'],
+                                                 columns['tx'], columns['ty'], columns['tz'])
+
+    def transform_batch(self, batch):
+        # the K matrices in one stack computation, then one multiply per
+        # request into a shared output that is split back into views
+        inst = self.metrics.instrumentation
+        d = self.dim
+        start = time.perf_counter()
+        matrices = self.matrices(batch)
+        inst.record('service_matrix', time.perf_counter() - start)
+        start = time.perf_counter()
+        counts = np.array([item[1].shape[0] for item in batch])
+        offsets = np.r_[0, np.cumsum(counts)]
+        result = np.empty((offsets[-1], d))
+        for (_, points, _), matrix, begin, end in zip(batch, matrices, offsets[:-1], offsets[1:]):
+            segment = result[begin:end]
+            np.matmul(points, matrix[:d, :d].T, out=segment)
+            segment += matrix[:d, d]
+        if self.decimals is not None:
+            np.round(result, self.decimals, out=result)
+        inst.record('service_transform', time.perf_counter() - start, result.shape[0], result.nbytes)
+        return np.split(result, offsets[1:-1])
+
+class TransformService:
+    def __init__(self, window = 0.002, max_batch = 256, max_pending = 1024, max_points = 1 << 22,
+                 max_body = 1 << 26, decimals = 3):
+        self.metrics = ServiceMetrics()
+        controller = Controller()
+        self.batchers = {dim: MicroBatcher(dim, controller, self.metrics, window, max_batch,
+                                           max_pending, max_points, decimals) for dim in (2, 3)}
+        self.max_body = max_body
+        self.server = None
+
+    async def start(self, host = '127.0.0.1', port = 8765, unix = None):
+        for batcher in self.batchers.values():
+            batcher.start()
+        if unix:
+            self.server = await asyncio.start_unix_server(self.handle_connection, path=unix)
+        else:
+            self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        for batcher in self.batchers.values():
+            await batcher.stop()
+
+    async def transform(self, dim, request):
+        # returns the transformed points as an N x dim array
+        points = np.asarray(request.get('points', []), dtype=np.float64)
+        if points.size == 0:
+            return np.empty((0, dim))
+        if points.ndim != 2 or points.shape[1] != dim:
+            raise ValueError(f"Expected points as an N x {dim} list, got shape {points.shape}")
+        params = {name: float(request.get(name, 1.0 if name == 'scale' else 0.0)) for name in PARAMETERS[dim]}
+        if dim == 3:
+            axis = [float(a) for a in request.get('axis', (0, 0, 1))]
+            if len(axis) != 3 or not any(axis):
+                raise ValueError("axis must be a non-zero [x, y, z] list")
+            params['axis'] = axis
+        start = time.perf_counter()
+        result = await self.batchers[dim].submit(params, points)
+        self.metrics.request_done(time.perf_counter() - start, points.shape[0])
+        return result
+
+    async def route(self, method, path, body):
+        # returns (status, content type, payload bytes)
+        if method == 'GET' and path == '/metrics':
+            return 200, 'text/plain; version=0.0.4', self.metrics.to_prometheus().encode()
+        if method == 'GET' and path == '/metrics.json':
+            return 200, 'application/json', json.dumps(self.metrics.snapshot()).encode()
+        if method == 'POST' and path in ('/transform2d', '/transform3d'):
+            try:
+                request = json.loads(body or b'{}')
+                result = await self.transform(2 if path == '/transform2d' else 3, request)
+            except Overloaded as e:
+                return 503, 'application/json', json.dumps({'error': f"overloaded: {e}"}).encode()
+            except TooLarge as e:
+                return 413, 'application/json', json.dumps({'error': str(e)}).encode()
+            except (ValueError, TypeError, AttributeError) as e:
+                return 400, 'application/json', json.dumps({'error': str(e)}).encode()
+            return 200, 'application/json', json.dumps({'points': result.tolist()}).encode()
+        return 404, 'application/json', json.dumps({'error': f"no route for {method} {path}"}).encode()
+
+    async def handle_connection(self, reader, writer):
+        # minimal HTTP/1.1 with keep-alive; one request at a time per connection
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, 'text/plain', b'bad request line', False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, 400, 'text/plain', b'bad content-length', False)
+                    break
+                if length > self.max_body:
+                    await self._respond(writer, 413, 'text/plain', b'request body too large', False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                status, content_type, payload = await self.route(method, path.split('?')[0], body)
+                await self._respond(writer, status, content_type, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, content_type, payload, keep_alive):
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large',
+                   503: 'Service Unavailable'}
+        headers = [f"HTTP/1.1 {status} {reasons.get(status, '')}",
+                   f"Content-Type: {content_type}",
+                   f"Content-Length: {len(payload)}",
+                   f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if status == 503:
+            headers.append("Retry-After: 1")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode('latin-1') + payload)
+        await writer.drain()
+
+async def serve(args):
+    service = TransformService(args.window_ms / 1000, args.max_batch, args.max_pending, args.max_points)
+    server = await service.start(args.host, args.port, args.unix)
+    where = args.unix or f"http://{args.host}:{args.port}"
+    print(f"Serving transforms on {where}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='serve on this Unix socket path instead of TCP')
+    parser.add_argument('--window-ms', type=float, default=2.0, help='batch window after the first request')
+    parser.add_argument('--max-batch', type=int, default=256, help='requests per batch')
+    parser.add_argument('--max-pending', type=int, default=1024, help='queued requests before answering 503')
+    parser.add_argument('--max-points', type=int, default=1 << 22, help='queued points before answering 503')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
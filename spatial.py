@@ -0,0 +1,232 @@
+import numpy as np
+
+def _as_points(points, dim = None):
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim == 1:
+        points = points.reshape(1, -1) if dim is None else points.reshape(-1, dim)
+    return points
+
+def _query_point(point):
+    # k-NN grows its search box until it covers the query, which never
+    # happens for a NaN or infinite one
+    point = np.asarray(point, dtype=np.float64)
+    if not np.isfinite(point).all():
+        raise ValueError(f"Query point must be finite, got {point.tolist()}")
+    return point
+
+def similarity_scale(matrix, tol = 1e-9):
+    # the uniform scale s of a homogeneous matrix [[s R, t], [0, 1]] with R
+    # orthogonal, or None when the matrix is not a similarity
+    matrix = np.asarray(matrix, dtype=np.float64)
+    d = matrix.shape[0] - 1
+    if matrix[d, d] == 0 or np.any(matrix[d, :d] != 0):
+        return None
+    linear = matrix[:d, :d] / matrix[d, d]
+    gram = linear.T @ linear
+    s2 = np.trace(gram) / d
+    if s2 <= 0 or not np.allclose(gram, s2 * np.identity(d), atol=tol * max(s2, 1)):
+        return None
+    return float(np.sqrt(s2))
+
+class GridIndex:
+    """Uniform-grid spatial index over an N x d point set (d = 2 or 3).
+
+    Points are bucketed by cell and sorted once. Appended points go to an
+    unsorted tail that is scanned linearly, and the grid is rebuilt when the
+    tail grows past a quarter of the indexed points. Queries return row
+    indices into the points in the order they were added; rows with a
+    non-finite coordinate are kept but never match.
+    """
+
+    def __init__(self, points, points_per_cell = 8):
+        points = _as_points(points)
+        self.dim = points.shape[1]
+        self.points_per_cell = points_per_cell
+        self._points = np.empty((max(points.shape[0], 16), self.dim))
+        self._points[:points.shape[0]] = points
+        self._size = points.shape[0]
+        self._finite = 0
+        self._build()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def points(self):
+        return self._points[:self._size]
+
+    def _build(self):
+        rows = np.flatnonzero(np.isfinite(self.points).all(axis=1))
+        points = self._points[rows]
+        self._indexed = self._size
+        self._finite = rows.shape[0]
+        if self._finite == 0:
+            self.origin = np.zeros(self.dim)
+            self.cell_size = 1.0
+            self._bounds = (np.zeros(self.dim), np.zeros(self.dim))
+            self._order = np.empty(0, dtype=np.intp)
+            self._starts = self._ends = np.empty(0, dtype=np.intp)
+            self._cells = np.empty((0, self.dim), dtype=np.int64)
+            self._keys = np.empty(0, dtype=np.int64)
+            self._shape = (1,) * self.dim
+            return
+        low, high = points.min(axis=0), points.max(axis=0)
+        self._bounds = (low, high)
+        span = high - low
+        extent = span.max()
+        if extent == 0:
+            cell_size = 1.0
+        else:
+            # cells sized for points_per_cell points on evenly spread data,
+            # ignoring flat axes
+            spans = np.maximum(span, extent * 1e-6)
+            cell_size = (np.prod(spans) * self.points_per_cell / self._finite) ** (1 / self.dim)
+        self.origin = low
+        self.cell_size = float(cell_size)
+        cells = np.floor((points - low) / self.cell_size).astype(np.int64)
+        self._shape = tuple(cells.max(axis=0) + 1)
+        keys = np.ravel_multi_index(tuple(cells.T), self._shape)
+        order = np.argsort(keys, kind='stable')
+        self._order = rows[order]
+        sorted_keys = keys[order]
+        starts = np.r_[0, np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1]
+        self._starts = starts
+        self._ends = np.r_[starts[1:], self._finite]
+        self._keys = sorted_keys[starts]
+        self._cells = cells[order[starts]]
+
+    def append(self, points):
+        points = _as_points(points, self.dim)
+        n = points.shape[0]
+        if self._size + n > self._points.shape[0]:
+            capacity = self._points.shape[0]
+            while capacity < self._size + n:
+                capacity *= 2
+            grown = np.empty((capacity, self.dim))
+            grown[:self._size] = self.points
+            self._points = grown
+        self._points[self._size:self._size + n] = points
+        self._size += n
+        points = points[np.isfinite(points).all(axis=1)]
+        if points.shape[0]:
+            low, high = self._bounds if self._finite else (points.min(axis=0), points.max(axis=0))
+            self._bounds = (np.minimum(low, points.min(axis=0)), np.maximum(high, points.max(axis=0)))
+            self._finite += points.shape[0]
+        if self._size - self._indexed > max(1024, self._indexed // 4):
+            self._build()
+
+    def _candidates(self, low, high):
+        # rows in every cell overlapping [low, high] plus the unsorted tail
+        shape = np.array(self._shape)
+        cell_low = np.clip(np.floor((low - self.origin) / self.cell_size), 0, shape).astype(np.int64)
+        cell_high = np.clip(np.floor((high - self.origin) / self.cell_size), -1, shape - 1).astype(np.int64)
+        counts = np.maximum(cell_high - cell_low + 1, 0)
+        if np.prod(counts) <= self._keys.shape[0] // 8:
+            # small boxes look their cells up directly
+            ranges = np.meshgrid(*[np.arange(l, h + 1) for l, h in zip(cell_low, cell_high)], indexing='ij')
+            keys = np.ravel_multi_index(tuple(r.reshape(-1) for r in ranges), self._shape)
+            found = np.minimum(np.searchsorted(self._keys, keys), max(self._keys.shape[0] - 1, 0))
+            hit = found[self._keys[found] == keys] if self._keys.shape[0] else found[:0]
+        else:
+            hit = np.flatnonzero(np.all((self._cells >= cell_low) & (self._cells <= cell_high), axis=1))
+        lengths = self._ends[hit] - self._starts[hit]
+        offsets = np.repeat(self._starts[hit] - np.r_[0, np.cumsum(lengths)[:-1]], lengths)
+        rows = self._order[offsets + np.arange(lengths.sum())]
+        if self._indexed < self._size:
+            tail = np.arange(self._indexed, self._size)
+            tail = tail[np.isfinite(self._points[tail]).all(axis=1)]
+            rows = np.concatenate([rows, tail])
+        return rows
+
+    def box(self, low, high):
+        low = np.asarray(low, dtype=np.float64)
+        high = np.asarray(high, dtype=np.float64)
+        rows = self._candidates(low, high)
+        points = self._points[rows]
+        return np.sort(rows[np.all((points >= low) & (points <= high), axis=1)])
+
+    def radius(self, center, r):
+        center = np.asarray(center, dtype=np.float64)
+        rows = self._candidates(center - r, center + r)
+        distances = np.linalg.norm(self._points[rows] - center, axis=1)
+        return np.sort(rows[distances <= r])
+
+    def knn(self, point, k = 1):
+        # (indices, distances) of the k nearest points, nearest first; the
+        # search box doubles until it holds k points no farther than its size
+        point = _query_point(point)
+        k = min(int(k), self._finite)
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        low, high = self._bounds
+        farthest = np.linalg.norm(np.maximum(np.abs(point - low), np.abs(point - high)))
+        r = self.cell_size * max(1.0, (k / self.points_per_cell) ** (1 / self.dim))
+        while True:
+            rows = self._candidates(point - r, point + r)
+            if rows.shape[0] >= k:
+                distances = np.linalg.norm(self._points[rows] - point, axis=1)
+                nearest = np.argpartition(distances, k - 1)[:k]
+                nearest = nearest[np.argsort(distances[nearest], kind='stable')]
+                if distances[nearest[-1]] <= r or r >= farthest:
+                    return rows[nearest], distances[nearest]
+            r *= 2
+
+    def transformed(self, matrix):
+        # an index over matrix-transformed points: a similarity only remaps
+        # queries onto this index, anything else builds a new grid, in which
+        # points sent to infinity (w = 0) never match
+        matrix = np.asarray(matrix, dtype=np.float64)
+        if matrix.shape != (self.dim + 1, self.dim + 1):
+            raise ValueError(f"Expected a {self.dim + 1}x{self.dim + 1} matrix, got {matrix.shape}")
+        scale = similarity_scale(matrix)
+        if scale is not None and scale > 0:
+            return RemappedIndex(self, matrix, scale)
+        mapped = self.points @ matrix[:self.dim].T[:self.dim] + matrix[:self.dim, self.dim]
+        w = self.points @ matrix[self.dim, :self.dim] + matrix[self.dim, self.dim]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mapped /= w[:, None]
+        return GridIndex(mapped, self.points_per_cell)
+
+class RemappedIndex:
+    """Queries in the space of similarity-transformed points, answered by
+    mapping them back onto the untransformed GridIndex. Points appended to
+    the base index are covered as well."""
+
+    def __init__(self, base, matrix, scale):
+        d = base.dim
+        self.base = base
+        self.dim = d
+        self.matrix = matrix / matrix[d, d]
+        self.scale = scale
+        self._linear = self.matrix[:d, :d]
+        self._inverse = self._linear.T / scale ** 2
+        self._offset = self.matrix[:d, d]
+
+    def __len__(self):
+        return len(self.base)
+
+    @property
+    def points(self):
+        return self.base.points @ self._linear.T + self._offset
+
+    def _to_base(self, points):
+        return (np.asarray(points, dtype=np.float64) - self._offset) @ self._inverse.T
+
+    def knn(self, point, k = 1):
+        rows, distances = self.base.knn(self._to_base(_query_point(point)), k)
+        return rows, distances * self.scale
+
+    def radius(self, center, r):
+        return self.base.radius(self._to_base(center), r / self.scale)
+
+    def box(self, low, high):
+        low = np.asarray(low, dtype=np.float64)
+        high = np.asarray(high, dtype=np.float64)
+        corners = np.array(np.meshgrid(*zip(low, high))).reshape(self.dim, -1).T
+        mapped = self._to_base(corners)
+        rows = self.base.box(mapped.min(axis=0), mapped.max(axis=0))
+        points = self.base.points[rows] @ self._linear.T + self._offset
+        return rows[np.all((points >= low) & (points <= high), axis=1)]
+
+    def transformed(self, matrix):
+        return self.base.transformed(np.asarray(matrix, dtype=np.float64) @ self.matrix)
@@ -0,0 +1,177 @@
+from itertools import islice
+import os
+import numpy as np
+
+from precision import get_dtype
+
+DEFAULT_CHUNK = 1 << 16
+
+def _is_stream(obj):
+    return hasattr(obj, 'read') or hasattr(obj, 'write')
+
+def infer_format(path, fmt = None):
+    if fmt is not None:
+        return fmt
+    if _is_stream(path):
+        return 'csv'
+    ext = os.path.splitext(str(path))[1].lower()
+    if ext == '.npy':
+        return 'npy'
+    if ext in ('.csv', '.txt'):
+        return 'csv'
+    return 'raw'
+
+def _source_format(source, fmt):
+    return 'array' if isinstance(source, np.ndarray) else infer_format(source, fmt)
+
+def _csv_format(decimals):
+    # rounded values print exactly at their decimals, anything else with
+    # enough significant digits to round-trip a float64
+    return '%.17g' if decimals is None else f'%.{max(decimals, 0)}f'
+
+def _check_width(shape, dim):
+    # only raw binary and in-memory arrays are flat; anything with columns
+    # has to have dim of them
+    if len(shape) < 2 or shape[-1] != dim:
+        raise ValueError(f"Expected {dim} columns per point, got shape {tuple(shape)}")
+
+def _open_array(source, dim, fmt, dtype):
+    if fmt == 'array':
+        return source.reshape(-1, dim)
+    if fmt == 'npy':
+        points = np.load(source, mmap_mode='r')
+        _check_width(points.shape, dim)
+        return points.reshape(-1, dim)
+    return np.memmap(source, dtype=dtype, mode='r').reshape(-1, dim)
+
+def _csv_chunks(lines, dim, chunk_size, dtype):
+    lines = (line for line in lines if line.strip())
+    while True:
+        block = list(islice(lines, chunk_size))
+        if not block:
+            return
+        block = np.loadtxt(block, delimiter=',', dtype=dtype, ndmin=2)
+        _check_width(block.shape, dim)
+        yield block
+
+def _read_stream(stream, dim, chunk_size, fmt, dtype):
+    # pipes cannot be memory-mapped or seeked, so binary input is read
+    # chunk_size rows at a time; .npy streams are parsed header first
+    if fmt == 'csv':
+        yield from _csv_chunks(stream, dim, chunk_size, dtype)
+        return
+    binary = getattr(stream, 'buffer', stream)
+    dtype = np.dtype(dtype)
+    if fmt == 'npy':
+        version = np.lib.format.read_magic(binary)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(binary)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(binary)
+        _check_width(shape, dim)
+        if fortran_order:
+            raise ValueError("Fortran-ordered .npy input cannot be streamed")
+    row_bytes = dtype.itemsize * dim
+    while True:
+        data = binary.read(chunk_size * row_bytes)
+        if not data:
+            return
+        if len(data) % row_bytes:
+            raise ValueError(f"Input ended mid-point: {len(data) % row_bytes} trailing bytes")
+        yield np.frombuffer(data, dtype=dtype).reshape(-1, dim)
+
+def count_points(source, dim, fmt = None, dtype = None):
+    dtype = get_dtype() if dtype is None else dtype
+    fmt = _source_format(source, fmt)
+    if fmt != 'csv':
+        return _open_array(source, dim, fmt, dtype).shape[0]
+    with open(source) as f:
+        return sum(1 for line in f if line.strip())
+
+def read_chunks(source, dim, chunk_size = DEFAULT_CHUNK, fmt = None, dtype = None):
+    # yields chunk_size x dim blocks; binary inputs are memory-mapped, not loaded
+    dtype = get_dtype() if dtype is None else dtype
+    fmt = _source_format(source, fmt)
+    if _is_stream(source):
+        yield from _read_stream(source, dim, chunk_size, fmt, dtype)
+        return
+    if fmt == 'csv':
+        with open(source) as f:
+            yield from _csv_chunks(f, dim, chunk_size, dtype)
+        return
+    points = _open_array(source, dim, fmt, dtype)
+    for start in range(0, points.shape[0], chunk_size):
+        yield np.asarray(points[start:start + chunk_size])
+
+def transform_chunk(chunk, matrix, decimals = 3):
+    # N x d inhomogeneous points through a (d + 1) x (d + 1) homogeneous matrix
+    dim = chunk.shape[1]
+    result = np.matmul(chunk, matrix[:dim, :dim].T)
+    result += matrix[:dim, dim]
+    if not np.array_equal(matrix[dim], np.eye(dim + 1)[dim]):
+        w = np.matmul(chunk, matrix[dim, :dim]) + matrix[dim, dim]
+        result /= w[:, None]
+    if decimals is not None:
+        np.round(result, decimals, out=result)
+    return result
+
+def transform_chunks(chunks, matrix, decimals = 3):
+    for chunk in chunks:
+        yield transform_chunk(chunk, matrix, decimals)
+
+def _write_stream(chunks, stream, dim, count, fmt, dtype, decimals):
+    written = 0
+    if fmt == 'csv':
+        for chunk in chunks:
+            np.savetxt(stream, chunk, delimiter=',', fmt=_csv_format(decimals))
+            written += chunk.shape[0]
+        stream.flush()
+        return written
+    binary = getattr(stream, 'buffer', stream)
+    if fmt == 'npy':
+        header = {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)), 'fortran_order': False, 'shape': (count, dim)}
+        np.lib.format.write_array_header_1_0(binary, header)
+    for chunk in chunks:
+        binary.write(np.ascontiguousarray(chunk, dtype=dtype).tobytes())
+        written += chunk.shape[0]
+    binary.flush()
+    return written
+
+def write_chunks(chunks, destination, dim, count = None, fmt = None, dtype = None, decimals = None):
+    dtype = get_dtype() if dtype is None else dtype
+    fmt = infer_format(destination, fmt)
+    if fmt == 'npy' and count is None:
+        # the .npy header records the shape, so input of unknown length
+        # (e.g. from a pipe) has to be collected first
+        chunks = [np.concatenate(list(chunks) or [np.empty((0, dim))])]
+        count = chunks[0].shape[0]
+    if _is_stream(destination):
+        return _write_stream(chunks, destination, dim, count, fmt, dtype, decimals)
+    written = 0
+    if fmt == 'npy':
+        out = np.lib.format.open_memmap(destination, mode='w+', dtype=dtype, shape=(count, dim))
+        for chunk in chunks:
+            out[written:written + chunk.shape[0]] = chunk
+            written += chunk.shape[0]
+        out.flush()
+        del out
+        return written
+    mode = 'w' if fmt == 'csv' else 'wb'
+    with open(destination, mode) as f:
+        for chunk in chunks:
+            if fmt == 'csv':
+                np.savetxt(f, chunk, delimiter=',', fmt=_csv_format(decimals))
+            else:
+                f.write(np.ascontiguousarray(chunk, dtype=dtype).tobytes())
+            written += chunk.shape[0]
+    return written
+
+def transform_file(source, destination, matrix, chunk_size = DEFAULT_CHUNK, in_fmt = None, out_fmt = None, dtype = None, decimals = 3):
+    matrix = np.asarray(matrix)
+    dtype = get_dtype() if dtype is None else dtype
+    dim = matrix.shape[0] - 1
+    count = None
+    if infer_format(destination, out_fmt) == 'npy' and not _is_stream(source):
+        count = count_points(source, dim, in_fmt, dtype)
+    chunks = read_chunks(source, dim, chunk_size, in_fmt, dtype)
+    return write_chunks(transform_chunks(chunks, matrix, decimals), destination, dim, count, out_fmt, dtype, decimals)